@@ -1,35 +1,53 @@
 """Discord Bot本体"""
 
 import asyncio
+import functools
+import hashlib
+import json
 import logging
 import os
+import time
+from dataclasses import replace
 from datetime import datetime
 from pathlib import Path
-from zoneinfo import ZoneInfo
 
+import aiosqlite
 import discord
 from discord.ext import commands
 
 from config import (
     DISCORD_BOT_TOKEN,
+    HEALTH_PORT,
     REMINDER_CHANNEL_ID,
     SPECIAL_COMMANDS,
-    TIMEZONE,
 )
 from database import (
     close_db,
+    count_user_reminders,
     create_reminder,
     delete_reminder,
     get_all_active_reminders,
+    get_bot_state,
     get_reminder_by_id,
     get_user_reminders,
     init_db,
+    set_bot_state,
     update_reminder_content,
     update_reminder_time_by_user,
 )
-from llm_parser import parse_reminder_input
-from scheduler import ReminderScheduler
-from utils import WEEKDAY_JA, format_remaining, format_repeat_label, parse_datetime_input
+from health_server import start_health_server
+from llm_parser import ParsedReminder, parse_reminder_input
+from scheduler import ReminderScheduler, SnoozeView
+from utils import (
+    TZ,
+    format_full_datetime,
+    format_remaining,
+    format_repeat_label,
+    format_short_datetime,
+    from_epoch,
+    parse_datetime_input,
+    truncate,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -41,32 +59,67 @@ class ReminderBot(commands.Bot):
         intents = discord.Intents.default()
         intents.message_content = True
 
+        # プレフィックスコマンドは使わないので既定の !help も登録しない（all_commands を空に保つ）
         super().__init__(
             command_prefix="!",
             intents=intents,
+            help_command=None,
         )
 
         self.scheduler: ReminderScheduler | None = None
-        self.tz = ZoneInfo(TIMEZONE)
+        self.health_server: asyncio.Server | None = None
+        self.tz = TZ
         # 専用チャンネルID
-        self.reminder_channel_id: int | None = int(REMINDER_CHANNEL_ID) if REMINDER_CHANNEL_ID else None
+        self.reminder_channel_id: int | None = REMINDER_CHANNEL_ID
 
     async def setup_hook(self):
         """Bot起動時の初期化"""
         await init_db()
 
         # アクティブなリマインダーのスヌーズViewを復元
-        from scheduler import SnoozeView
-        active_reminders = await get_all_active_reminders()
-        for r in active_reminders:
-            is_recurring = bool(r.get("repeat_type") and r["repeat_type"] != "none")
-            self.add_view(SnoozeView(r["id"], bot=self, is_recurring=is_recurring))
+        # 期限切れでも繰り返しリマインダーは過去の通知メッセージにボタンが残るため、時刻では絞り込まない
+        views = [
+            SnoozeView(r["id"], bot=self, is_recurring=bool(r["repeat_type"]))
+            for r in await get_all_active_reminders()
+        ]
+        for view in views:
+            self.add_view(view)
+        logger.info(f"スヌーズView復元: {len(views)}件")
 
         self.scheduler = ReminderScheduler(self)
         await self.scheduler.start()
 
-        await self.tree.sync()
-        logger.info("スラッシュコマンド同期完了")
+        # ヘルスエンドポイント起動（Botのイベントループ上で動かす）
+        try:
+            self.health_server = await start_health_server(port=HEALTH_PORT)
+        except OSError as e:
+            logger.warning(f"Health server failed to start: {e}")
+
+        # コマンド同期はHTTP往復で起動を遅らせるため、バックグラウンドで必要時のみ行う
+        self._tree_sync_task = asyncio.create_task(self._maybe_sync_tree())
+
+    async def _maybe_sync_tree(self):
+        """コマンド定義が前回同期時から変わっていればスラッシュコマンドを同期"""
+        try:
+            payload = json.dumps(
+                [command.to_dict(self.tree) for command in self.tree.get_commands()],
+                sort_keys=True,
+            )
+            tree_hash = hashlib.sha256(payload.encode()).hexdigest()
+        except Exception as e:
+            # ハッシュを作れなければ比較せずに同期する（前回の値は更新しない）
+            logger.warning(f"コマンド定義のハッシュ計算に失敗、同期のみ実行: {e}")
+            tree_hash = None
+        try:
+            if tree_hash is not None and await get_bot_state("tree_hash") == tree_hash:
+                logger.info("スラッシュコマンド変更なし: 同期をスキップ")
+                return
+            await self.tree.sync()
+            if tree_hash is not None:
+                await set_bot_state("tree_hash", tree_hash)
+            logger.info("スラッシュコマンド同期完了")
+        except Exception as e:
+            logger.error(f"スラッシュコマンド同期エラー: {e}")
 
     async def on_ready(self):
         """Bot準備完了時"""
@@ -91,6 +144,11 @@ class ReminderBot(commands.Bot):
             self._lock_check_started = True
             self.loop.create_task(self._check_lock_loop())
 
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        """削除されたチャンネルのキャッシュを破棄"""
+        if self.scheduler:
+            self.scheduler.forget_channel(channel.id)
+
     async def _check_lock_loop(self):
         """ロックファイル監視: 自分のPIDでなければ自主退出"""
         lock_path = Path(__file__).parent / "bot.lock"
@@ -116,16 +174,18 @@ class ReminderBot(commands.Bot):
             return
 
         # 専用チャンネルのメッセージを処理
-        if self.reminder_channel_id and message.channel.id == self.reminder_channel_id:
+        reminder_channel_id = self.reminder_channel_id
+        if reminder_channel_id is not None and message.channel.id == reminder_channel_id:
             await self.handle_reminder_message(message)
             return
 
-        await self.process_commands(message)
+        # プレフィックスコマンド未登録、またはプレフィックスで始まらないなら解析自体をスキップ
+        if self.all_commands and message.content.startswith(self.command_prefix):
+            await self.process_commands(message)
 
     async def handle_reminder_message(self, message: discord.Message):
         """専用チャンネルのメッセージを処理"""
-        import time
-        start_time = time.time()
+        start_time = time.monotonic()
         logger.info(f"メッセージ受信: {message.content[:50]}")
 
         content = message.content.strip()
@@ -133,16 +193,16 @@ class ReminderBot(commands.Bot):
         if not content:
             return
 
-        # 特殊コマンドチェック
-        if content in SPECIAL_COMMANDS:
-            command = SPECIAL_COMMANDS[content]
-            if command == "list":
-                await self.show_reminder_list(message)
-            return
+        # 特殊コマンドチェック（通常のリマインダー文は長さだけで除外）
+        if len(content) <= _SPECIAL_COMMAND_MAX_LEN:
+            handler = _SPECIAL_COMMAND_HANDLERS.get(content)
+            if handler is not None:
+                await handler(self, message)
+                return
 
-        # LLMで解析
+        # 「2026/01/29 18:00 歯医者」形式は直接パース、それ以外はパターンマッチ/LLMで解析
         try:
-            result = await parse_reminder_input(content)
+            result = _parse_explicit_datetime(content) or await parse_reminder_input(content)
         except Exception as e:
             logger.error(f"解析中にエラー: {e}", exc_info=True)
             await message.channel.send(
@@ -156,18 +216,15 @@ class ReminderBot(commands.Bot):
             )
             return
 
-        logger.info(f"解析完了: content={result['content']}, datetime={result['datetime']}, 処理時間={time.time()-start_time:.2f}秒")
+        logger.info(f"解析完了: content={result.content}, datetime={result.remind_at}, 処理時間={time.monotonic() - start_time:.2f}秒")
 
         # 確認画面を表示
         view = ConfirmReminderView(
             bot=self,
-            user_id=str(message.author.id),
-            guild_id=str(message.guild.id) if message.guild else None,
-            channel_id=str(message.channel.id),
-            content=result["content"],
-            remind_at=result["datetime"],
-            repeat_type=result.get("repeat_type"),
-            repeat_value=result.get("repeat_value"),
+            user_id=message.author.id,
+            guild_id=message.guild.id if message.guild else None,
+            channel_id=message.channel.id,
+            parsed=result,
         )
 
         embed = view.create_confirm_embed()
@@ -176,41 +233,45 @@ class ReminderBot(commands.Bot):
 
     async def show_reminder_list(self, message: discord.Message):
         """リマインダー一覧を表示"""
-        reminders = await get_user_reminders(str(message.author.id))
+        # セレクトメニューに載る25件だけ取得し、それを超える場合のみ件数を数える
+        user_id = str(message.author.id)
+        reminders = await get_user_reminders(user_id, limit=25)
 
         if not reminders:
             await message.channel.send("登録済みのリマインダーはありません。")
             return
+        total = len(reminders) if len(reminders) < 25 else await count_user_reminders(user_id)
 
         embed = discord.Embed(
             title="リマインダーリスト",
             color=discord.Color.blue(),
         )
 
-        for r in reminders[:10]:
-            remind_at = datetime.fromisoformat(r["remind_at"])
-            weekday = WEEKDAY_JA[remind_at.weekday()]
-            remaining = format_remaining(remind_at)
-            time_str = f"{remind_at.strftime('%m/%d')} ({weekday}) {remind_at.strftime('%H:%M')} - {remaining}"
+        # 日時表示は1件につき1回だけ生成し、Embedとセレクトメニューで共有する
+        time_labels = [_format_time_label(r["remind_at"]) for r in reminders]
 
-            if r.get("repeat_type") and r["repeat_type"] != "none":
-                time_str += f" ({format_repeat_label(r['repeat_type'], r.get('repeat_value'))})"
+        for r, time_str in zip(reminders[:10], time_labels):
+            if r["repeat_type"]:
+                time_str += f" ({format_repeat_label(r['repeat_type'], r['repeat_value'])})"
 
             embed.add_field(
-                name=r["content"][:50],
+                name=truncate(r["content"], 50),
                 value=time_str,
                 inline=False,
             )
 
-        if len(reminders) > 10:
-            embed.set_footer(text=f"他 {len(reminders) - 10} 件")
+        if total > 10:
+            embed.set_footer(text=f"他 {total - 10} 件")
 
-        view = ReminderListView(reminders[:25], str(message.author.id), bot_instance=self)
+        options = _build_select_options(reminders, time_labels)
+        view = ReminderListView(reminders, message.author.id, bot_instance=self, options=options)
         sent = await message.channel.send(embed=embed, view=view)
         view.message = sent
 
     async def close(self):
         """Bot終了時"""
+        if self.health_server:
+            self.health_server.close()
         try:
             if self.scheduler:
                 await self.scheduler.stop()
@@ -223,19 +284,59 @@ class ReminderBot(commands.Bot):
         await super().close()
 
 
-class ConfirmReminderView(discord.ui.View):
+# 特殊コマンドの入力文字列 → 処理メソッド（SPECIAL_COMMANDSの値から一度だけ解決）
+_COMMAND_METHODS = {
+    "list": ReminderBot.show_reminder_list,
+}
+_SPECIAL_COMMAND_HANDLERS = {text: _COMMAND_METHODS[command] for text, command in SPECIAL_COMMANDS.items()}
+# これより長いメッセージは特殊コマンドになり得ないので辞書を引かない
+_SPECIAL_COMMAND_MAX_LEN = max(map(len, SPECIAL_COMMANDS), default=0)
+
+
+DENIED_MSG = "他のユーザーのリマインダーは操作できません。"
+
+
+def require_owner(func):
+    """操作者がViewの持ち主か確認してからコールバックを実行するデコレータ"""
+
+    @functools.wraps(func)
+    async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message(DENIED_MSG, ephemeral=True)
+            return
+        return await func(self, interaction, *args, **kwargs)
+
+    return wrapper
+
+
+class TimeoutDisableView(discord.ui.View):
+    """タイムアウト時に部品を無効化して元メッセージへ反映するView"""
+
+    message: discord.Message | None = None
+
+    async def on_timeout(self):
+        """タイムアウト時にボタン・セレクトメニューを無効化"""
+        # 送信先メッセージが無い（ephemeral応答等）なら編集できないので何もしない
+        if not self.message:
+            return
+        for item in self.children:
+            item.disabled = True
+        try:
+            await self.message.edit(view=self)
+        except (discord.NotFound, discord.HTTPException):
+            pass
+
+
+class ConfirmReminderView(TimeoutDisableView):
     """リマインダー確認用View"""
 
     def __init__(
         self,
         bot: ReminderBot,
-        user_id: str,
-        guild_id: str | None,
-        channel_id: str,
-        content: str,
-        remind_at: datetime,
-        repeat_type: str | None = None,
-        repeat_value: str | None = None,
+        user_id: int,
+        guild_id: int | None,
+        channel_id: int,
+        parsed: ParsedReminder,
     ):
         super().__init__(timeout=180)
         self.message = None
@@ -243,16 +344,15 @@ class ConfirmReminderView(discord.ui.View):
         self.user_id = user_id
         self.guild_id = guild_id
         self.channel_id = channel_id
-        self.content = content
-        self.remind_at = remind_at
-        self.repeat_type = repeat_type
-        self.repeat_value = repeat_value
+        self.parsed = parsed
+        # 日時表示は再描画のたびに使うので、日時が変わるまで使い回す
+        self._formatted = format_full_datetime(parsed.remind_at)
 
     def create_confirm_embed(self) -> discord.Embed:
         """確認用Embedを作成"""
-        weekday = WEEKDAY_JA[self.remind_at.weekday()]
-        display_content = self.content[:200] + "..." if len(self.content) > 200 else self.content
-        remaining = format_remaining(self.remind_at)
+        parsed = self.parsed
+        display_content = truncate(parsed.content, 200, "...")
+        remaining = format_remaining(parsed.remind_at)
 
         embed = discord.Embed(
             title="リマインダー確認",
@@ -261,49 +361,46 @@ class ConfirmReminderView(discord.ui.View):
         )
         embed.add_field(
             name="日時",
-            value=f"{self.remind_at.strftime('%Y/%m/%d')} ({weekday}) {self.remind_at.strftime('%H:%M')} - {remaining}",
+            value=f"{self._formatted} - {remaining}",
             inline=True,
         )
 
-        if self.repeat_type and self.repeat_type != "none":
-            embed.add_field(name="繰り返し", value=format_repeat_label(self.repeat_type, self.repeat_value), inline=True)
+        if parsed.repeat_type:
+            embed.add_field(name="繰り返し", value=format_repeat_label(parsed.repeat_type, parsed.repeat_value), inline=True)
 
         embed.set_footer(text="3分以内にボタンを押してください")
         return embed
 
     @discord.ui.button(label="登録", style=discord.ButtonStyle.success)
+    @require_owner
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != self.user_id:
-            await interaction.response.send_message("他のユーザーのリマインダーは操作できません。", ephemeral=True)
-            return
-
+        parsed = self.parsed
         reminder_id = await create_reminder(  # noqa: F841
-            user_id=self.user_id,
-            guild_id=self.guild_id,
-            channel_id=self.channel_id,
-            content=self.content,
-            remind_at=self.remind_at,
-            repeat_type=self.repeat_type,
-            repeat_value=self.repeat_value,
+            user_id=str(self.user_id),
+            guild_id=str(self.guild_id) if self.guild_id is not None else None,
+            channel_id=str(self.channel_id),
+            content=parsed.content,
+            remind_at=parsed.remind_at,
+            repeat_type=parsed.repeat_type,
+            repeat_value=parsed.repeat_value,
         )
 
-        weekday = WEEKDAY_JA[self.remind_at.weekday()]
-        remaining = format_remaining(self.remind_at)
+        remaining = format_remaining(parsed.remind_at)
 
         embed = discord.Embed(
             title="登録完了",
-            description=self.content,
+            description=parsed.content,
             color=discord.Color.green(),
         )
         embed.add_field(
             name="通知日時",
-            value=f"{self.remind_at.strftime('%Y/%m/%d')} ({weekday}) {self.remind_at.strftime('%H:%M')}",
+            value=self._formatted,
             inline=True,
         )
         embed.add_field(name="通知まで", value=remaining, inline=True)
 
-        if self.repeat_type and self.repeat_type != "none":
-            embed.add_field(name="繰り返し", value=format_repeat_label(self.repeat_type, self.repeat_value), inline=True)
+        if parsed.repeat_type:
+            embed.add_field(name="繰り返し", value=format_repeat_label(parsed.repeat_type, parsed.repeat_value), inline=True)
 
         embed.set_footer(text="登録しました")
 
@@ -313,23 +410,17 @@ class ConfirmReminderView(discord.ui.View):
         await interaction.response.edit_message(embed=embed, view=self)
 
     @discord.ui.button(label="日時変更", style=discord.ButtonStyle.primary)
+    @require_owner
     async def change_time(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != self.user_id:
-            await interaction.response.send_message("他のユーザーのリマインダーは操作できません。", ephemeral=True)
-            return
-
         modal = DateTimeModal(self)
         await interaction.response.send_modal(modal)
 
     @discord.ui.button(label="キャンセル", style=discord.ButtonStyle.secondary)
+    @require_owner
     async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != self.user_id:
-            await interaction.response.send_message("他のユーザーのリマインダーは操作できません。", ephemeral=True)
-            return
-
         embed = discord.Embed(
             title="キャンセル",
-            description=self.content,
+            description=self.parsed.content,
             color=discord.Color.light_grey(),
         )
 
@@ -338,15 +429,38 @@ class ConfirmReminderView(discord.ui.View):
 
         await interaction.response.edit_message(embed=embed, view=self)
 
-    async def on_timeout(self):
-        """タイムアウト時にボタンを無効化"""
-        for item in self.children:
-            item.disabled = True
-        if self.message:
-            try:
-                await self.message.edit(view=self)
-            except (discord.NotFound, discord.HTTPException):
-                pass
+
+@functools.lru_cache(maxsize=512)
+def _parse_remind_at(timestamp: int) -> tuple[datetime, str]:
+    """保存値（Unix秒）の日時と短縮表示をキャッシュ（時刻変更時は値が変わるので自然に無効化）"""
+    remind_at = from_epoch(timestamp)
+    return remind_at, format_short_datetime(remind_at)
+
+
+def _format_time_label(timestamp: int) -> str:
+    """一覧表示用の日時ラベル（例: 01/29 (木) 18:00 - あと3時間）"""
+    # 残り時間は表示のたびに変わるのでキャッシュしない
+    remind_at, short = _parse_remind_at(timestamp)
+    return f"{short} - {format_remaining(remind_at)}"
+
+
+def _parse_explicit_datetime(content: str, now: datetime | None = None) -> ParsedReminder | None:
+    """「日付 時刻 内容」形式（例: 2026/01/29 18:00 歯医者）を直接パース。該当しなければNone。
+
+    年を省略した日付（例: 01/05）が now 以前になる場合は翌年とみなす。
+    """
+    parts = content.split(maxsplit=2)
+    if len(parts) < 3 or "/" not in parts[0]:
+        return None
+    if now is None:
+        now = datetime.now(TZ)
+    remind_at = parse_datetime_input(parts[0], parts[1], now)
+    if remind_at is not None and parts[0].count("/") == 1 and remind_at <= now:
+        # 翌年に存在しない日付（2/29）はNoneになり、パターンマッチ/LLMに回る
+        remind_at = parse_datetime_input(f"{now.year + 1}/{parts[0]}", parts[1], now)
+    if remind_at is None:
+        return None
+    return ParsedReminder(content=parts[2], remind_at=remind_at)
 
 
 async def _resolve_datetime(date_str: str, time_str: str) -> datetime | None:
@@ -357,7 +471,7 @@ async def _resolve_datetime(date_str: str, time_str: str) -> datetime | None:
         return result
     # LLMフォールバック
     llm_result = await parse_reminder_input(f"{date_str} {time_str}に予定")
-    return llm_result["datetime"] if llm_result else None
+    return llm_result.remind_at if llm_result else None
 
 
 class DateTimeModal(discord.ui.Modal, title="日時変更"):
@@ -379,8 +493,8 @@ class DateTimeModal(discord.ui.Modal, title="日時変更"):
     def __init__(self, parent_view: ConfirmReminderView):
         super().__init__()
         self.parent_view = parent_view
-        self.date_input.default = parent_view.remind_at.strftime("%Y/%m/%d")
-        self.time_input.default = parent_view.remind_at.strftime("%H:%M")
+        self.date_input.default = parent_view.parsed.remind_at.strftime("%Y/%m/%d")
+        self.time_input.default = parent_view.parsed.remind_at.strftime("%H:%M")
 
     async def on_submit(self, interaction: discord.Interaction):
         new_datetime = await _resolve_datetime(self.date_input.value, self.time_input.value)
@@ -391,31 +505,47 @@ class DateTimeModal(discord.ui.Modal, title="日時変更"):
             )
             return
 
-        self.parent_view.remind_at = new_datetime
+        self.parent_view.parsed = replace(self.parent_view.parsed, remind_at=new_datetime)
+        self.parent_view._formatted = format_full_datetime(new_datetime)
         embed = self.parent_view.create_confirm_embed()
         await interaction.response.edit_message(embed=embed, view=self.parent_view)
 
 
-class ReminderListView(discord.ui.View):
+def _build_select_options(reminders: list[aiosqlite.Row], time_labels: list[str]) -> list[discord.SelectOption]:
+    """一覧のセレクトメニュー用の選択肢を生成"""
+    select_option = discord.SelectOption
+    return [
+        select_option(label=truncate(r["content"], 50), description=truncate(desc, 100), value=str(r["id"]))
+        for r, desc in zip(reminders, time_labels)
+    ]
+
+
+class ReminderListView(TimeoutDisableView):
     """リマインダー一覧用View"""
 
-    def __init__(self, reminders: list[dict], user_id: str, bot_instance: "ReminderBot" = None):
+    def __init__(
+        self,
+        reminders: list[aiosqlite.Row],
+        user_id: int,
+        bot_instance: "ReminderBot" = None,
+        options: list[discord.SelectOption] | None = None,
+    ):
         super().__init__(timeout=180)
         self.message = None
         self.user_id = user_id
         self.bot_instance = bot_instance
 
+        # 選択時のDB再取得を避けるため、表示中の行をIDで引けるようにしておく
+        self._by_id: dict[int, aiosqlite.Row] = {}
+
         if reminders:
-            options = []
-            for r in reminders[:25]:
-                ra = datetime.fromisoformat(r["remind_at"])
-                wd = WEEKDAY_JA[ra.weekday()]
-                desc = f"{ra.strftime('%m/%d')} ({wd}) {ra.strftime('%H:%M')} - {format_remaining(ra)}"
-                options.append(discord.SelectOption(
-                    label=f"{r['content'][:50]}",
-                    description=desc[:100],
-                    value=str(r["id"]),
-                ))
+            # セレクトメニューは最大25件。呼び出し元で切り詰め済みならコピーしない
+            if len(reminders) > 25:
+                reminders = reminders[:25]
+            self._by_id = {r["id"]: r for r in reminders}
+            # 呼び出し元で生成済みの選択肢があれば再利用
+            if options is None:
+                options = _build_select_options(reminders, [_format_time_label(r["remind_at"]) for r in reminders])
             select = discord.ui.Select(
                 placeholder="操作するリマインダーを選択...",
                 options=options,
@@ -423,12 +553,13 @@ class ReminderListView(discord.ui.View):
             select.callback = self.select_callback
             self.add_item(select)
 
+    def forget(self, reminder_id: int):
+        """変更・削除されたリマインダーの保持行を破棄（次の選択時はDBから取り直す）"""
+        self._by_id.pop(reminder_id, None)
+
+    @require_owner
     async def select_callback(self, interaction: discord.Interaction):
         """選択後にReminderActionViewで詳細操作を表示"""
-        if str(interaction.user.id) != self.user_id:
-            await interaction.response.send_message("他のユーザーのリマインダーは操作できません。", ephemeral=True)
-            return
-
         values = interaction.data.get("values", []) if interaction.data else []
         if not values:
             await interaction.response.send_message("選択されていません。", ephemeral=True)
@@ -440,64 +571,63 @@ class ReminderListView(discord.ui.View):
             await interaction.response.send_message("無効な選択です。", ephemeral=True)
             return
 
-        reminder = await get_reminder_by_id(reminder_id)
+        reminder = self._by_id.get(reminder_id) or await get_reminder_by_id(reminder_id)
         if not reminder:
             await interaction.response.send_message("リマインダーが見つかりません。", ephemeral=True)
             return
 
-        action_view = ReminderActionView(reminder_id, reminder, self.bot_instance)
+        action_view = ReminderActionView(reminder_id, reminder, self.bot_instance, list_view=self)
         embed = action_view.create_embed()
         await interaction.response.send_message(embed=embed, view=action_view, ephemeral=True)
 
-    async def on_timeout(self):
-        """タイムアウト時にセレクトメニューを無効化"""
-        for item in self.children:
-            item.disabled = True
-        if self.message:
-            try:
-                await self.message.edit(view=self)
-            except (discord.NotFound, discord.HTTPException):
-                pass
 
-
-class ReminderActionView(discord.ui.View):
+class ReminderActionView(TimeoutDisableView):
     """リマインダー操作用View（ephemeral、セレクト選択後に表示）"""
 
-    def __init__(self, reminder_id: int, reminder: dict, bot_instance: ReminderBot):
+    def __init__(
+        self,
+        reminder_id: int,
+        reminder: aiosqlite.Row,
+        bot_instance: ReminderBot,
+        list_view: ReminderListView | None = None,
+    ):
         super().__init__(timeout=180)
         self.message = None
         self.reminder_id = reminder_id
         self.reminder = reminder
         self.bot_instance = bot_instance
+        self.user_id = int(reminder["user_id"])
+        # 選択元の一覧（変更・削除したら一覧が保持している行を破棄する）
+        self.list_view = list_view
+
+    def _forget_in_list(self):
+        """選択元の一覧が保持している行を破棄"""
+        if self.list_view is not None:
+            self.list_view.forget(self.reminder_id)
 
     def create_embed(self) -> discord.Embed:
         """リマインダー詳細Embedを作成"""
-        remind_at = datetime.fromisoformat(self.reminder["remind_at"])
-        weekday = WEEKDAY_JA[remind_at.weekday()]
-        remaining = format_remaining(remind_at)
-        time_str = f"{remind_at.strftime('%m/%d')} ({weekday}) {remind_at.strftime('%H:%M')} - {remaining}"
+        time_str = _format_time_label(self.reminder["remind_at"])
 
-        content_title = self.reminder["content"][:253] + "..." if len(self.reminder["content"]) > 256 else self.reminder["content"]
+        content_title = truncate(self.reminder["content"], 256, "...")
         embed = discord.Embed(
             title=content_title,
             color=discord.Color.blue(),
         )
         embed.add_field(name="日時", value=time_str, inline=True)
 
-        if self.reminder.get("repeat_type") and self.reminder["repeat_type"] != "none":
-            embed.add_field(name="繰り返し", value=format_repeat_label(self.reminder['repeat_type'], self.reminder.get('repeat_value')), inline=True)
+        if self.reminder["repeat_type"]:
+            embed.add_field(name="繰り返し", value=format_repeat_label(self.reminder['repeat_type'], self.reminder['repeat_value']), inline=True)
 
         return embed
 
     @discord.ui.button(label="削除", style=discord.ButtonStyle.danger)
+    @require_owner
     async def delete_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """リマインダーを削除"""
-        if self.reminder["user_id"] != str(interaction.user.id):
-            await interaction.response.send_message("他のユーザーのリマインダーは操作できません。", ephemeral=True)
-            return
-
-        deleted = await delete_reminder(self.reminder_id, str(interaction.user.id))
+        deleted = await delete_reminder(self.reminder_id, self.reminder["user_id"])
         if deleted:
+            self._forget_in_list()
             embed = discord.Embed(
                 title="削除完了",
                 description=f"**{self.reminder['content']}** を削除しました。",
@@ -510,35 +640,23 @@ class ReminderActionView(discord.ui.View):
             await interaction.response.send_message("削除に失敗しました。", ephemeral=True)
 
     @discord.ui.button(label="タイトル変更", style=discord.ButtonStyle.primary)
+    @require_owner
     async def edit_content_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """タイトル変更モーダルを開く"""
-        if self.reminder["user_id"] != str(interaction.user.id):
-            await interaction.response.send_message("他のユーザーのリマインダーは操作できません。", ephemeral=True)
-            return
-
+        # 送信されれば一覧の保持行は古くなるので、開いた時点で破棄しておく
+        self._forget_in_list()
         modal = EditContentModal(self.reminder_id, self.reminder["content"], self.bot_instance)
         await interaction.response.send_modal(modal)
 
     @discord.ui.button(label="時刻変更", style=discord.ButtonStyle.primary)
+    @require_owner
     async def edit_time_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """時刻変更モーダルを開く"""
-        if self.reminder["user_id"] != str(interaction.user.id):
-            await interaction.response.send_message("他のユーザーのリマインダーは操作できません。", ephemeral=True)
-            return
-
+        # 送信されれば一覧の保持行は古くなるので、開いた時点で破棄しておく
+        self._forget_in_list()
         modal = EditTimeModal(self.reminder_id, self.reminder["remind_at"], self.bot_instance)
         await interaction.response.send_modal(modal)
 
-    async def on_timeout(self):
-        """タイムアウト時にボタンを無効化"""
-        for item in self.children:
-            item.disabled = True
-        if self.message:
-            try:
-                await self.message.edit(view=self)
-            except (discord.NotFound, discord.HTTPException):
-                pass
-
 
 class EditContentModal(discord.ui.Modal, title="タイトル変更"):
     """リマインダーの内容編集モーダル"""
@@ -591,11 +709,11 @@ class EditTimeModal(discord.ui.Modal, title="時刻変更"):
         max_length=10,
     )
 
-    def __init__(self, reminder_id: int, current_remind_at: str, bot_instance: "ReminderBot" = None):
+    def __init__(self, reminder_id: int, current_remind_at: int, bot_instance: "ReminderBot" = None):
         super().__init__()
         self.reminder_id = reminder_id
         self.bot_instance = bot_instance
-        remind_at = datetime.fromisoformat(current_remind_at)
+        remind_at = from_epoch(current_remind_at)
         self.date_input.default = remind_at.strftime("%Y/%m/%d")
         self.time_input.default = remind_at.strftime("%H:%M")
 
@@ -613,9 +731,8 @@ class EditTimeModal(discord.ui.Modal, title="時刻変更"):
         )
 
         if success:
-            weekday = WEEKDAY_JA[new_datetime.weekday()]
             await interaction.response.send_message(
-                f"時刻を **{new_datetime.strftime('%Y/%m/%d')} ({weekday}) {new_datetime.strftime('%H:%M')}** に変更しました。",
+                f"時刻を **{format_full_datetime(new_datetime)}** に変更しました。",
                 ephemeral=True,
             )
         else:
@@ -624,5 +741,27 @@ class EditTimeModal(discord.ui.Modal, title="時刻変更"):
 
 def run_bot():
     """Botを起動（毎回新しいインスタンスを生成してセッション汚染を防ぐ）"""
+    # uvloopがあればそのループで動かす（Windowsでは未対応のため標準ループのまま）
+    # プロセス全体のポリシーは変えず、このRunnerが作るループだけを差し替える
+    try:
+        import uvloop
+    except ImportError:
+        loop_factory = None
+    else:
+        loop_factory = uvloop.new_event_loop
+
     bot = ReminderBot()
-    bot.run(DISCORD_BOT_TOKEN)
+
+    async def runner():
+        async with bot:
+            await bot.start(DISCORD_BOT_TOKEN)
+
+    # bot.run() と同じく discord ロガーだけに既定のハンドラを付ける
+    # （root=True だと main.py が設定したルートロガーにも出力され、全行が二重になる）
+    discord.utils.setup_logging(root=False)
+    try:
+        with asyncio.Runner(loop_factory=loop_factory) as loop_runner:
+            loop_runner.run(runner())
+    except KeyboardInterrupt:
+        # bot.run() と同じく、Ctrl+C はループの後始末だけして正常終了扱い
+        return
@@ -34,13 +34,19 @@ DB_PATH = BASE_DIR / "reminders.db"
 TIMEZONE = "Asia/Tokyo"
 
 # スケジューラ設定
-SCHEDULER_CHECK_INTERVAL_SEC = 30  # リマインダーチェック間隔
+SCHEDULER_CHECK_INTERVAL_SEC = 30  # 期限切れが残った場合の再チェック間隔
+SCHEDULER_RESYNC_INTERVAL_MIN = 5  # 変更通知を取りこぼしても次回チェック時刻を再計算する間隔
+DB_OPTIMIZE_INTERVAL_MIN = 15  # PRAGMA optimize の実行間隔
+
+# ヘルスチェックエンドポイントのポート
+HEALTH_PORT = 18791
 
 # ログ設定
 LOGS_DIR = BASE_DIR / "logs"
 
 # 専用チャンネル設定（DiscordのチャンネルID）
-REMINDER_CHANNEL_ID = get_env("REMINDER_CHANNEL_ID", required=False)
+_reminder_channel_id = get_env("REMINDER_CHANNEL_ID", required=False)
+REMINDER_CHANNEL_ID: int | None = int(_reminder_channel_id) if _reminder_channel_id else None
 
 # 特殊コマンド（専用チャンネル内）
 SPECIAL_COMMANDS = {
@@ -1,39 +1,138 @@
 """SQLiteデータベース操作モジュール（非同期・共有接続）"""
 
 import asyncio
+import contextlib
 import logging
 from datetime import datetime
 
 import aiosqlite
 
 from config import DB_PATH
+from utils import TZ, from_epoch, to_epoch
 
 logger = logging.getLogger(__name__)
 
+# 取得時に repeat_type の "none" を NULL に正規化し、呼び出し側は真偽値だけで判定できるようにする
+_REMINDER_COLUMNS = (
+    "id, user_id, guild_id, channel_id, content, remind_at,"
+    " NULLIF(repeat_type, 'none') AS repeat_type, repeat_value,"
+    " created_at, is_active, error_count"
+)
+
+# 接続時に適用するPRAGMA（WAL前提の安全な設定）
+_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-65536;
+PRAGMA mmap_size=268435456;
+PRAGMA busy_timeout=5000;
+PRAGMA wal_autocheckpoint=1000;
+"""
+
+# 起動時に作成するテーブル・インデックス
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    guild_id TEXT,
+    channel_id TEXT NOT NULL,
+    content TEXT NOT NULL,
+    remind_at INTEGER NOT NULL,
+    repeat_type TEXT,
+    repeat_value TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    is_active INTEGER DEFAULT 1,
+    error_count INTEGER DEFAULT 0
+);
+-- アクティブな行だけを持つ部分インデックス（一覧・期限チェックともにソート不要で引ける）
+CREATE INDEX IF NOT EXISTS idx_user_active_time ON reminders(user_id, remind_at) WHERE is_active = 1;
+CREATE INDEX IF NOT EXISTS idx_due ON reminders(remind_at) WHERE is_active = 1;
+-- 部分インデックスで置き換えた旧インデックスを削除
+DROP INDEX IF EXISTS idx_remind_at;
+DROP INDEX IF EXISTS idx_user_id;
+DROP INDEX IF EXISTS idx_active_remind_at;
+-- Bot状態保存テーブル（常設メッセージIDなど）
+CREATE TABLE IF NOT EXISTS bot_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
 # 共有接続（asyncio.Lockで競合状態を防止）
 _db: aiosqlite.Connection | None = None
-_db_lock = asyncio.Lock()
+
+
+class _LoopPrimitives:
+    """イベントループごとに作るロック・イベント
+
+    asyncio.Lock / Event は最初に待ったループに結び付き、別のループで待つと RuntimeError になる。
+    main.py はクラッシュ後に同じプロセスで run_bot() を呼び直し新しいループを作るので、ループが変わったら作り直す。
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.db_lock = asyncio.Lock()
+        # 共有接続への書き込みの直列化（_transaction 中に他の書き込みが入り、ロールバックで巻き込まれるのを防ぐ）
+        self.write_lock = asyncio.Lock()
+        # リマインダーの追加・時刻変更の通知（スケジューラが次回チェック時刻を再計算する）
+        self.reminders_changed = asyncio.Event()
+
+
+_primitives: _LoopPrimitives | None = None
+
+
+def _loop_primitives() -> _LoopPrimitives:
+    """実行中のイベントループ用のロック・イベントを取得"""
+    global _primitives
+    loop = asyncio.get_running_loop()
+    if _primitives is None or _primitives.loop is not loop:
+        _primitives = _LoopPrimitives(loop)
+    return _primitives
+
+
+def _write_lock() -> asyncio.Lock:
+    """共有接続への書き込み用ロックを取得（書き込みは必ずこのロックの中で行う）"""
+    return _loop_primitives().write_lock
 
 
 async def _get_db() -> aiosqlite.Connection:
     """共有DB接続を取得（未接続なら接続）"""
     global _db
-    async with _db_lock:
+    async with _loop_primitives().db_lock:
         if _db is None:
             DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-            _db = await aiosqlite.connect(DB_PATH)
+            # 自動コミットモード: 単文の書き込みは暗黙のBEGIN/COMMITなしで即確定、複数文は _transaction で囲む
+            _db = await aiosqlite.connect(DB_PATH, isolation_level=None)
             _db.row_factory = aiosqlite.Row
-            # WALモードで読み書きの並行性向上
-            result = await _db.execute("PRAGMA journal_mode=WAL")
+            # WALモードで読み書きの並行性向上、WAL下で安全な範囲でfsyncを減らしキャッシュを拡大
+            await _db.executescript(_PRAGMAS)
+            result = await _db.execute("PRAGMA journal_mode")
             mode = await result.fetchone()
             logger.info(f"SQLite journal_mode: {mode[0] if mode else 'unknown'}")
     return _db
 
 
+@contextlib.asynccontextmanager
+async def _transaction(db: aiosqlite.Connection):
+    """複数文の書き込みを1トランザクションにまとめる（自動コミットモード用）
+
+    接続は共有なので、書き込みロックを持ったまま BEGIN〜COMMIT を行う。
+    """
+    async with _write_lock():
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            await db.rollback()
+            raise
+        await db.commit()
+
+
 async def close_db():
     """共有接続を閉じる"""
     global _db
-    async with _db_lock:
+    async with _loop_primitives().db_lock:
         if _db is not None:
             await _db.close()
             _db = None
@@ -42,44 +141,44 @@ async def close_db():
 async def init_db():
     """データベース初期化"""
     db = await _get_db()
-    await db.execute("""
-        CREATE TABLE IF NOT EXISTS reminders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT NOT NULL,
-            guild_id TEXT,
-            channel_id TEXT NOT NULL,
-            content TEXT NOT NULL,
-            remind_at DATETIME NOT NULL,
-            repeat_type TEXT,
-            repeat_value TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            is_active INTEGER DEFAULT 1,
-            error_count INTEGER DEFAULT 0
-        )
-    """)
+    # テーブル・インデックス定義は1回の executescript でまとめて実行
+    await db.executescript(_SCHEMA)
     # 既存DBへのマイグレーション: error_count カラムが無ければ追加
     try:
         await db.execute("ALTER TABLE reminders ADD COLUMN error_count INTEGER DEFAULT 0")
-        await db.commit()
         logger.info("マイグレーション: error_count カラムを追加")
     except aiosqlite.OperationalError:
         pass  # カラムが既に存在する場合は無視
-    await db.execute("CREATE INDEX IF NOT EXISTS idx_remind_at ON reminders(remind_at)")
-    await db.execute("CREATE INDEX IF NOT EXISTS idx_user_id ON reminders(user_id)")
-    await db.execute(
-        "CREATE INDEX IF NOT EXISTS idx_active_remind_at ON reminders(is_active, remind_at)"
-    )
+    # マイグレーション: remind_at をISO文字列からUnix秒（整数）に変換
+    cursor = await db.execute("SELECT id, remind_at FROM reminders WHERE typeof(remind_at) = 'text'")
+    text_rows = await cursor.fetchall()
+    if text_rows:
+        converted = []
+        invalid = []
+        for row in text_rows:
+            try:
+                remind_at = datetime.fromisoformat(row[1])
+            except ValueError:
+                # 1件の不正値で起動のたびに失敗（再起動ループ）しないよう、その行だけ無効化して続ける
+                logger.warning(f"マイグレーション: remind_at を解釈できないため無効化 (ID={row[0]}, remind_at={row[1]!r})")
+                invalid.append((row[0],))
+                continue
+            if remind_at.tzinfo is None:
+                remind_at = remind_at.replace(tzinfo=TZ)
+            converted.append((to_epoch(remind_at), row[0]))
+        async with _transaction(db):
+            await db.executemany("UPDATE reminders SET remind_at = ? WHERE id = ?", converted)
+            await db.executemany("UPDATE reminders SET is_active = 0 WHERE id = ?", invalid)
+        logger.info(f"マイグレーション: remind_at を整数に変換 ({len(converted)}件、無効化 {len(invalid)}件)")
+
+    await db.execute("PRAGMA optimize")
+    logger.info("データベース初期化完了")
 
-    # Bot状態保存テーブル（常設メッセージIDなど）
-    await db.execute("""
-        CREATE TABLE IF NOT EXISTS bot_state (
-            key TEXT PRIMARY KEY,
-            value TEXT NOT NULL
-        )
-    """)
 
-    await db.commit()
-    logger.info("データベース初期化完了")
+async def optimize_db():
+    """クエリプランナーの統計情報を更新（定期実行用）"""
+    db = await _get_db()
+    await db.execute("PRAGMA optimize")
 
 
 async def create_reminder(
@@ -93,106 +192,140 @@ async def create_reminder(
 ) -> int:
     """リマインダーを作成"""
     db = await _get_db()
-    cursor = await db.execute(
-        """INSERT INTO reminders
-           (user_id, guild_id, channel_id, content, remind_at, repeat_type, repeat_value)
-           VALUES (?, ?, ?, ?, ?, ?, ?)""",
-        (user_id, guild_id, channel_id, content, remind_at.isoformat(), repeat_type, repeat_value),
-    )
-    await db.commit()
+    async with _write_lock():
+        cursor = await db.execute(
+            """INSERT INTO reminders
+               (user_id, guild_id, channel_id, content, remind_at, repeat_type, repeat_value)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (user_id, guild_id, channel_id, content, to_epoch(remind_at), repeat_type, repeat_value),
+        )
+    _loop_primitives().reminders_changed.set()
     reminder_id = cursor.lastrowid
     logger.info(f"リマインダー作成: ID={reminder_id}, user={user_id}, at={remind_at}")
     return reminder_id
 
 
-async def get_due_reminders(now: datetime) -> list[dict]:
+async def get_due_reminders(now: datetime) -> list[aiosqlite.Row]:
     """通知すべきリマインダーを取得"""
     db = await _get_db()
     cursor = await db.execute(
-        """SELECT * FROM reminders
+        f"""SELECT {_REMINDER_COLUMNS} FROM reminders
            WHERE is_active = 1 AND remind_at <= ?
            ORDER BY remind_at""",
-        (now.isoformat(),),
+        (to_epoch(now),),
     )
-    rows = await cursor.fetchall()
-    return [dict(row) for row in rows]
+    return await cursor.fetchall()
 
 
-async def get_user_reminders(user_id: str, include_inactive: bool = False) -> list[dict]:
-    """ユーザーのリマインダー一覧を取得"""
+async def next_due_at() -> datetime | None:
+    """次に通知すべきアクティブなリマインダーの日時を取得"""
     db = await _get_db()
-    if include_inactive:
-        cursor = await db.execute(
-            "SELECT * FROM reminders WHERE user_id = ? ORDER BY remind_at",
-            (user_id,),
-        )
-    else:
-        cursor = await db.execute(
-            "SELECT * FROM reminders WHERE user_id = ? AND is_active = 1 ORDER BY remind_at",
-            (user_id,),
-        )
-    rows = await cursor.fetchall()
-    return [dict(row) for row in rows]
+    cursor = await db.execute("SELECT MIN(remind_at) FROM reminders WHERE is_active = 1")
+    row = await cursor.fetchone()
+    return from_epoch(row[0]) if row and row[0] is not None else None
 
 
-async def get_reminder_by_id(reminder_id: int) -> dict | None:
-    """IDでリマインダーを取得"""
+async def wait_for_reminder_change():
+    """リマインダーの追加・時刻変更があるまで待つ"""
+    reminders_changed = _loop_primitives().reminders_changed
+    await reminders_changed.wait()
+    reminders_changed.clear()
+
+
+async def get_user_reminders(
+    user_id: str,
+    include_inactive: bool = False,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+) -> list[aiosqlite.Row]:
+    """ユーザーのリマインダー一覧を取得
+
+    limit で件数を絞り、after に前ページ末尾の (remind_at, id) を渡すとその続きから取得する。
+    """
+    db = await _get_db()
+    sql = f"SELECT {_REMINDER_COLUMNS} FROM reminders WHERE user_id = ?"
+    params: list = [user_id]
+    if not include_inactive:
+        sql += " AND is_active = 1"
+    if after is not None:
+        sql += " AND (remind_at, id) > (?, ?)"
+        params += [to_epoch(after[0]), after[1]]
+    sql += " ORDER BY remind_at, id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    cursor = await db.execute(sql, params)
+    return await cursor.fetchall()
+
+
+async def count_user_reminders(user_id: str) -> int:
+    """ユーザーのアクティブなリマインダー件数を取得"""
     db = await _get_db()
     cursor = await db.execute(
-        "SELECT * FROM reminders WHERE id = ?",
-        (reminder_id,),
+        "SELECT COUNT(*) FROM reminders WHERE user_id = ? AND is_active = 1",
+        (user_id,),
     )
     row = await cursor.fetchone()
-    return dict(row) if row else None
+    return row[0] if row else 0
 
 
-async def deactivate_reminder(reminder_id: int) -> bool:
-    """リマインダーを非アクティブにする"""
+async def get_reminder_by_id(reminder_id: int) -> aiosqlite.Row | None:
+    """IDでリマインダーを取得"""
     db = await _get_db()
     cursor = await db.execute(
-        "UPDATE reminders SET is_active = 0 WHERE id = ?",
+        f"SELECT {_REMINDER_COLUMNS} FROM reminders WHERE id = ?",
         (reminder_id,),
     )
-    await db.commit()
+    return await cursor.fetchone()
+
+
+async def deactivate_reminder(reminder_id: int) -> bool:
+    """リマインダーを非アクティブにする"""
+    db = await _get_db()
+    async with _write_lock():
+        cursor = await db.execute(
+            "UPDATE reminders SET is_active = 0 WHERE id = ?",
+            (reminder_id,),
+        )
     return cursor.rowcount > 0
 
 
 async def increment_error_count(reminder_id: int) -> int:
     """送信エラーカウントを1増やし、新しいカウントを返す"""
     db = await _get_db()
-    cursor = await db.execute(
-        "UPDATE reminders SET error_count = error_count + 1 WHERE id = ?",
-        (reminder_id,),
-    )
-    await db.commit()
-    if cursor.rowcount == 0:
-        return 0
-    row_cursor = await db.execute(
-        "SELECT error_count FROM reminders WHERE id = ?",
-        (reminder_id,),
-    )
-    row = await row_cursor.fetchone()
+    async with _write_lock():
+        cursor = await db.execute(
+            "UPDATE reminders SET error_count = error_count + 1 WHERE id = ?",
+            (reminder_id,),
+        )
+        if cursor.rowcount == 0:
+            return 0
+        row_cursor = await db.execute(
+            "SELECT error_count FROM reminders WHERE id = ?",
+            (reminder_id,),
+        )
+        row = await row_cursor.fetchone()
     return row[0] if row else 0
 
 
 async def reset_error_count(reminder_id: int) -> None:
     """送信エラーカウントをリセットする"""
     db = await _get_db()
-    await db.execute(
-        "UPDATE reminders SET error_count = 0 WHERE id = ?",
-        (reminder_id,),
-    )
-    await db.commit()
+    async with _write_lock():
+        await db.execute(
+            "UPDATE reminders SET error_count = 0 WHERE id = ?",
+            (reminder_id,),
+        )
 
 
 async def delete_reminder(reminder_id: int, user_id: str) -> bool:
     """リマインダーを削除（ユーザー確認付き）"""
     db = await _get_db()
-    cursor = await db.execute(
-        "DELETE FROM reminders WHERE id = ? AND user_id = ?",
-        (reminder_id, user_id),
-    )
-    await db.commit()
+    async with _write_lock():
+        cursor = await db.execute(
+            "DELETE FROM reminders WHERE id = ? AND user_id = ?",
+            (reminder_id, user_id),
+        )
     deleted = cursor.rowcount > 0
     if deleted:
         logger.info(f"リマインダー削除: ID={reminder_id}, user={user_id}")
@@ -202,14 +335,28 @@ async def delete_reminder(reminder_id: int, user_id: str) -> bool:
 async def update_reminder_time(reminder_id: int, new_remind_at: datetime) -> bool:
     """リマインダーの通知時刻を更新（繰り返し用）"""
     db = await _get_db()
-    cursor = await db.execute(
-        "UPDATE reminders SET remind_at = ? WHERE id = ?",
-        (new_remind_at.isoformat(), reminder_id),
-    )
-    await db.commit()
+    async with _write_lock():
+        cursor = await db.execute(
+            "UPDATE reminders SET remind_at = ? WHERE id = ?",
+            (to_epoch(new_remind_at), reminder_id),
+        )
     return cursor.rowcount > 0
 
 
+async def update_reminder_times_bulk(updates: list[tuple[int, datetime, int]]) -> int:
+    """複数リマインダーの通知時刻をまとめて更新（繰り返し用）し、更新した件数を返す
+
+    updates は (ID, 次回日時, 取得時の remind_at)。取得後に時刻が変わった行（送信中のスヌーズなど）は上書きしない。
+    """
+    db = await _get_db()
+    async with _transaction(db):
+        cursor = await db.executemany(
+            "UPDATE reminders SET remind_at = ? WHERE id = ? AND remind_at = ?",
+            [(to_epoch(remind_at), reminder_id, fetched_at) for reminder_id, remind_at, fetched_at in updates],
+        )
+    return cursor.rowcount
+
+
 async def get_bot_state(key: str) -> str | None:
     """Bot状態を取得"""
     db = await _get_db()
@@ -224,31 +371,30 @@ async def get_bot_state(key: str) -> str | None:
 async def set_bot_state(key: str, value: str) -> None:
     """Bot状態を保存"""
     db = await _get_db()
-    await db.execute(
-        "INSERT OR REPLACE INTO bot_state (key, value) VALUES (?, ?)",
-        (key, value),
-    )
-    await db.commit()
+    async with _write_lock():
+        await db.execute(
+            "INSERT OR REPLACE INTO bot_state (key, value) VALUES (?, ?)",
+            (key, value),
+        )
 
 
-async def get_all_active_reminders() -> list[dict]:
+async def get_all_active_reminders() -> list[aiosqlite.Row]:
     """全ユーザーのアクティブなリマインダーを取得"""
     db = await _get_db()
     cursor = await db.execute(
-        "SELECT * FROM reminders WHERE is_active = 1 ORDER BY remind_at",
+        f"SELECT {_REMINDER_COLUMNS} FROM reminders WHERE is_active = 1 ORDER BY remind_at",
     )
-    rows = await cursor.fetchall()
-    return [dict(row) for row in rows]
+    return await cursor.fetchall()
 
 
 async def update_reminder_content(reminder_id: int, user_id: str, new_content: str) -> bool:
     """リマインダーの内容を更新（ユーザー所有権チェック付き）"""
     db = await _get_db()
-    cursor = await db.execute(
-        "UPDATE reminders SET content = ? WHERE id = ? AND user_id = ?",
-        (new_content, reminder_id, user_id),
-    )
-    await db.commit()
+    async with _write_lock():
+        cursor = await db.execute(
+            "UPDATE reminders SET content = ? WHERE id = ? AND user_id = ?",
+            (new_content, reminder_id, user_id),
+        )
     if cursor.rowcount > 0:
         logger.info(f"リマインダー内容更新: ID={reminder_id}, user={user_id}")
         return True
@@ -258,12 +404,13 @@ async def update_reminder_content(reminder_id: int, user_id: str, new_content: s
 async def update_reminder_time_by_user(reminder_id: int, user_id: str, new_time: datetime) -> bool:
     """リマインダーの通知時刻を更新（ユーザー所有権チェック付き）"""
     db = await _get_db()
-    cursor = await db.execute(
-        "UPDATE reminders SET remind_at = ? WHERE id = ? AND user_id = ?",
-        (new_time.isoformat(), reminder_id, user_id),
-    )
-    await db.commit()
+    async with _write_lock():
+        cursor = await db.execute(
+            "UPDATE reminders SET remind_at = ? WHERE id = ? AND user_id = ?",
+            (to_epoch(new_time), reminder_id, user_id),
+        )
     if cursor.rowcount > 0:
+        _loop_primitives().reminders_changed.set()
         logger.info(f"リマインダー時刻更新: ID={reminder_id}, user={user_id}, new_time={new_time}")
         return True
     return False
@@ -272,12 +419,13 @@ async def update_reminder_time_by_user(reminder_id: int, user_id: str, new_time:
 async def snooze_reminder(reminder_id: int, new_remind_at: datetime) -> bool:
     """リマインダーをスヌーズ（再通知時刻を設定）"""
     db = await _get_db()
-    cursor = await db.execute(
-        "UPDATE reminders SET remind_at = ?, is_active = 1 WHERE id = ?",
-        (new_remind_at.isoformat(), reminder_id),
-    )
-    await db.commit()
+    async with _write_lock():
+        cursor = await db.execute(
+            "UPDATE reminders SET remind_at = ?, is_active = 1 WHERE id = ?",
+            (to_epoch(new_remind_at), reminder_id),
+        )
     if cursor.rowcount > 0:
+        _loop_primitives().reminders_changed.set()
         logger.info(f"リマインダースヌーズ: ID={reminder_id}, new_time={new_remind_at}")
         return True
     return False
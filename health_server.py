@@ -2,42 +2,47 @@
 
 Usage:
     from health_server import start_health_server
-    start_health_server(port=18790)  # Call before bot.run()
+    server = await start_health_server(port=18790)  # Call from the bot's event loop
+    ...
+    server.close()
 
-Runs an HTTP server in a daemon thread. GET /health returns 200 OK.
+Serves on the running asyncio loop (no extra thread). GET /health returns 200 OK.
 """
 
-import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class _HealthHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        if self.path == "/health":
-            self.send_response(200)
-            self.send_header("Content-Type", "text/plain")
-            self.end_headers()
-            self.wfile.write(b"OK")
-        else:
-            self.send_response(404)
-            self.end_headers()
+_OK_RESPONSE = b"HTTP/1.0 200 OK\r\nContent-Type: text/plain\r\nContent-Length: 2\r\n\r\nOK"
+_NOT_FOUND_RESPONSE = b"HTTP/1.0 404 Not Found\r\nContent-Length: 0\r\n\r\n"
+# Seconds to wait for the request line before dropping an idle client
+_READ_TIMEOUT = 5.0
 
-    def log_message(self, format, *args):
-        pass  # suppress request logs
 
+async def _handle_health(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Answer a single request and close the connection.
 
-def start_health_server(port: int = 18790):
-    """Start a health check HTTP server in a background thread."""
-    def _run():
+    Probes send one fixed request line, so a prefix match on the first chunk
+    is enough; headers are never parsed.
+    """
+    try:
+        data = await asyncio.wait_for(reader.read(64), _READ_TIMEOUT)
+        writer.write(_OK_RESPONSE if data.startswith(b"GET /health") else _NOT_FOUND_RESPONSE)
+        await writer.drain()
+    except (ConnectionError, TimeoutError):
+        pass
+    finally:
+        writer.close()
         try:
-            server = HTTPServer(("127.0.0.1", port), _HealthHandler)
-            logger.info(f"Health server started on port {port}")
-            server.serve_forever()
-        except Exception as e:
-            logger.error(f"Health server failed: {e}")
-
-    t = threading.Thread(target=_run, daemon=True)
-    t.start()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def start_health_server(port: int = 18790) -> asyncio.Server:
+    """Start a health check HTTP server on the running event loop."""
+    server = await asyncio.start_server(_handle_health, "127.0.0.1", port)
+    logger.info(f"Health server started on port {port}")
+    return server
@@ -2,32 +2,47 @@
 
 import asyncio
 import calendar
+import functools
 import json
 import logging
 import re
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 
-from config import GROQ_API_KEY, TIMEZONE
+from config import GROQ_API_KEY
+from utils import TZ
 
 logger = logging.getLogger(__name__)
 llm_fallback_logger = logging.getLogger("llm_fallback")
 
 # Groqクライアント（遅延初期化）
-_client: OpenAI | None = None
+_client: AsyncOpenAI | None = None
 
 
-def _get_client() -> OpenAI:
+def _get_client() -> AsyncOpenAI:
     global _client
     if _client is None:
-        _client = OpenAI(
+        _client = AsyncOpenAI(
             api_key=GROQ_API_KEY,
             base_url="https://api.groq.com/openai/v1",
         )
     return _client
 
+
+@dataclass(slots=True, frozen=True)
+class ParsedReminder:
+    """parse_reminder_inputの解析結果（不変なのでキャッシュからそのまま返せる）"""
+
+    content: str
+    remind_at: datetime
+    repeat_type: str | None = None
+    repeat_value: str | None = None
+
+
 # LLM用スキーマ
 PARSE_DATETIME_TOOL = {
     "type": "function",
@@ -46,171 +61,240 @@ PARSE_DATETIME_TOOL = {
         },
     },
 }
+# リクエストごとに同じ値を組み立て直さないよう、ツール指定は使い回す
+_LLM_TOOLS = [PARSE_DATETIME_TOOL]
+_LLM_TOOL_CHOICE = {"type": "function", "function": {"name": "set_datetime"}}
+
+
+# 全角数字→半角数字の変換表
+_ZEN2HAN = str.maketrans('０１２３４５６７８９', '0123456789')
+# HH:MM 形式の時刻
+_RE_COLON_TIME = re.compile(r'(\d{1,2}):(\d{2})')
+
+
+def _colon_to_ji(m: re.Match) -> str:
+    """HH:MM のマッチを X時 / X時Y分 に置き換える"""
+    h, mi = m.group(1), m.group(2)
+    if mi == '00':
+        return f'{int(h)}時'
+    return f'{int(h)}時{int(mi)}分'
 
 
 def normalize_numbers(text: str) -> str:
     """全角数字を半角に変換し、HH:MM形式をX時Y分に正規化"""
-    zen = '０１２３４５６７８９'
-    han = '0123456789'
-    for z, h in zip(zen, han):
-        text = text.replace(z, h)
-    # HH:MM → X時Y分 に正規化（パターンマッチを統一するため）
-    def _colon_to_ji(m):
-        h, mi = m.group(1), m.group(2)
-        if mi == '00':
-            return f'{int(h)}時'
-        return f'{int(h)}時{int(mi)}分'
-    text = re.sub(r'(\d{1,2}):(\d{2})', _colon_to_ji, text)
+    text = text.translate(_ZEN2HAN)
+    # HH:MM → X時Y分 に正規化（パターンマッチを統一するため）。コロンが無ければ正規表現は不要
+    if ':' in text:
+        text = _RE_COLON_TIME.sub(_colon_to_ji, text)
     return text
 
 
 WEEKDAY_MAP = {'月': 0, '火': 1, '水': 2, '木': 3, '金': 4, '土': 5, '日': 6}
 WEEKDAY_NAMES = ['月', '火', '水', '木', '金', '土', '日']
+# _DAYS_AHEAD[今日の曜日][対象曜日]: 次の対象曜日までの日数（1〜7。今日が対象曜日なら7）
+_DAYS_AHEAD = tuple(tuple((target - today - 1) % 7 + 1 for target in range(7)) for today in range(7))
+# 今週末（土曜）までの日数（土日なら0）
+_DAYS_TO_WEEKEND = (5, 4, 3, 2, 1, 0, 0)
+
+# 時刻表現（呼び出しごとにパターンを解釈しないようモジュール読み込み時にコンパイル）
+_RE_HOUR_PM = re.compile(r'午後\s*(\d+)\s*時')
+_RE_HOUR_AM = re.compile(r'午前\s*(\d+)\s*時')
+_RE_HOUR = re.compile(r'(\d+)\s*時')
+_RE_HALF = re.compile(r'(\d+)\s*時\s*半')
+_RE_HHMM = re.compile(r'(\d+)\s*時\s*(\d+)\s*分')
+# 1〜11時を午後とみなす語（「深夜」は「夜」で拾える）
+_RE_PM_CONTEXT = re.compile('昼|夕方|夜')
+# 時刻だけの指定ではない（日付を伴う）ことを示す語
+_RE_DATE_CONTEXT = re.compile('明日|明後日|来週|今週|次の|月|今度')
+_RE_DATE_OR_MERIDIEM_CONTEXT = re.compile('明日|明後日|来週|今週|次の|月|今度|午前|午後')
+
+# 時刻語とその時（上から順に判定。「お昼」「深夜」を「昼」「夜」より先に置く）
+_TIME_WORDS = (('朝', 8), ('正午', 12), ('お昼', 12), ('昼', 12), ('夕方', 17), ('深夜', 23), ('夜', 20))
+# 「X時」の指定より優先する時刻語
+_EXACT_TIME_WORDS = (('正午', 12), ('お昼', 12), ('深夜', 23))
+
+
+def _next_occurrence(now: datetime, hour: int, minute: int = 0) -> datetime:
+    """今日のhour:minute、過ぎていれば翌日の同時刻"""
+    result = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if result < now:
+        result += timedelta(days=1)
+    return result
 
 
 def extract_hour(t: str, default: int = 9) -> int:
     """テキストから時刻を抽出"""
-    # 午後X時
-    m = re.search(r'午後\s*(\d+)\s*時', t)
-    if m:
-        h = int(m.group(1))
-        return h + 12 if h < 12 else h
-    # 午前X時
-    m = re.search(r'午前\s*(\d+)\s*時', t)
-    if m:
-        return int(m.group(1))
-    # X時半 / X時Y分 / X時
-    m = re.search(r'(\d+)\s*時', t)
-    if m:
-        h = int(m.group(1))
-        # 昼/夕方/夜のコンテキストがあれば1〜11時をPMに補正
-        is_pm_context = any(w in t for w in ['昼', '夕方', '夜', '深夜'])
-        is_am_context = '朝' in t
-        if is_pm_context and not is_am_context and 1 <= h <= 11:
-            h += 12
-        return h
-    # 朝昼夕夜（時刻指定なし）— 長いキーワードを先にチェック
-    if '朝' in t:
-        return 8
-    if '正午' in t or 'お昼' in t:
-        return 12
-    if '昼' in t:
-        return 12
-    if '夕方' in t:
-        return 17
-    if '深夜' in t:
-        return 23
-    if '夜' in t:
-        return 20
+    # 「X時」の指定が無ければ正規表現は走らせない
+    if '時' in t:
+        # 午後X時
+        m = _RE_HOUR_PM.search(t)
+        if m:
+            h = int(m.group(1))
+            return h + 12 if h < 12 else h
+        # 午前X時
+        m = _RE_HOUR_AM.search(t)
+        if m:
+            return int(m.group(1))
+        # X時半 / X時Y分 / X時
+        m = _RE_HOUR.search(t)
+        if m:
+            h = int(m.group(1))
+            # 昼/夕方/夜のコンテキストがあれば1〜11時をPMに補正
+            is_pm_context = _RE_PM_CONTEXT.search(t) is not None
+            is_am_context = '朝' in t
+            if is_pm_context and not is_am_context and 1 <= h <= 11:
+                h += 12
+            return h
+    # 朝昼夕夜（時刻指定なし）
+    for word, hour in _TIME_WORDS:
+        if word in t:
+            return hour
     return default
 
 
 def extract_minute(t: str) -> int:
     """テキストから分を抽出"""
+    if '時' not in t:
+        return 0
     # X時半
-    if re.search(r'\d+\s*時\s*半', t):
+    if _RE_HALF.search(t):
         return 30
     # X時Y分
-    m = re.search(r'\d+\s*時\s*(\d+)\s*分', t)
+    m = _RE_HHMM.search(t)
     if m:
-        return int(m.group(1))
+        return int(m.group(2))
     return 0
 
 
-def parse_repeat_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> dict | None:
+def extract_hm(t: str, default_hour: int = 9) -> tuple[int, int]:
+    """テキストから時・分をまとめて抽出"""
+    return extract_hour(t, default_hour), extract_minute(t)
+
+
+def _set_time(base_date: datetime, hour: int, minute: int) -> datetime:
+    """日付の時刻部分を hour:minute:00 に置き換える"""
+    return base_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+def _apply_time(base_date: datetime, t: str, default_hour: int = 9) -> datetime:
+    """日付とテキスト中の時刻を組み合わせる"""
+    return _set_time(base_date, *extract_hm(t, default_hour))
+
+
+def _next_weekday_date(now: datetime, target_wd: int) -> datetime:
+    """次の指定曜日の日付を返す（今日が該当曜日なら来週）"""
+    return now + timedelta(days=_DAYS_AHEAD[now.weekday()][target_wd])
+
+
+def _nth_weekday_of_month(year: int, month: int, nth: int, weekday: int, tz: ZoneInfo) -> datetime | None:
+    """指定月の第N X曜日を計算。存在しなければNone"""
+    # 1日の曜日
+    first = datetime(year, month, 1, tzinfo=tz)
+    # 第1 X曜日
+    days_ahead = weekday - first.weekday()
+    if days_ahead < 0:
+        days_ahead += 7
+    first_target = first + timedelta(days=days_ahead)
+    # 第N
+    result = first_target + timedelta(weeks=nth - 1)
+    if result.month != month:
+        return None
+    return result
+
+
+def _month_end(year: int, month: int, tz: ZoneInfo) -> datetime:
+    """指定月の最終日（0時）"""
+    return datetime(year, month, calendar.monthrange(year, month)[1], tzinfo=tz)
+
+
+def _next_month_year(y: int, m: int) -> tuple[int, int]:
+    nm = m + 1
+    ny = y
+    if nm > 12:
+        nm = 1
+        ny += 1
+    return ny, nm
+
+
+def _find_next_nth_weekday(
+    now: datetime, tz: ZoneInfo, time_text: str, nths: list[int], weekday: int, offset_days: int = 0
+) -> datetime | None:
+    """複数の第N指定から、now以降の最も近い日を返す"""
+    hour, minute = extract_hm(time_text)
+    candidates = []
+    # 今月と来月から候補を集める
+    for y, m_val in [(now.year, now.month), _next_month_year(now.year, now.month)]:
+        for n in nths:
+            target = _nth_weekday_of_month(y, m_val, n, weekday, tz)
+            if target is not None:
+                dt = _set_time(target + timedelta(days=offset_days), hour, minute)
+                if dt > now:
+                    candidates.append(dt)
+    if candidates:
+        return min(candidates)
+    return None
+
+
+# 繰り返し表現
+_RE_MONTHLY_NTH_EVE = re.compile(r'毎月\s*第\s*([\d,、]+)\s*([月火水木金土日])\s*曜?日?\s*の?\s*前日')
+_RE_MONTHLY_NTH = re.compile(r'毎月\s*第\s*([\d,、]+)\s*([月火水木金土日])\s*曜?日?')
+_RE_MONTHLY_DAY = re.compile(r'毎月\s*(\d+)\s*日')
+_RE_BIWEEKLY = re.compile(r'隔週\s*([月火水木金土日])\s*曜?日?')
+_RE_WEEKLY = re.compile(r'毎週\s*([月火水木金土日])\s*曜?日?')
+
+
+def parse_repeat_pattern(
+    user_input: str, now: datetime, tz: ZoneInfo, text: str | None = None, content: str | None = None
+) -> dict | None:
     """繰り返し表現をパターンマッチで解析
 
+    text に normalize_numbers 済みの入力、content に extract_content の結果を渡すと、計算をやり直さない。
+
     Returns:
         {"repeat_type": str, "repeat_value": str|None, "remind_at": datetime} or None
     """
-    text = normalize_numbers(user_input)
+    if text is None:
+        text = normalize_numbers(user_input)
+    # 繰り返し表現はどれも「毎」「隔週」「平日」のいずれかを含む。無ければcontent抽出もせずに抜ける
+    if '毎' not in text and '隔週' not in text and '平日' not in text:
+        return None
     # contentを除去した日時表現部分のみから時刻を抽出する
-    content = extract_content(user_input)
+    if content is None:
+        content = extract_content(user_input, text)
     time_text = text.replace(content, '') if content != user_input else text
 
-    def make_dt(base_date: datetime, hour: int, minute: int) -> datetime:
-        return base_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
-
-    def next_weekday_date(target_wd: int) -> datetime:
-        """次の指定曜日の日付を返す（今日が該当曜日なら来週）"""
-        days_ahead = target_wd - now.weekday()
-        if days_ahead <= 0:
-            days_ahead += 7
-        return now + timedelta(days=days_ahead)
-
-    def nth_weekday_of_month(year: int, month: int, nth: int, weekday: int) -> datetime | None:
-        """指定月の第N X曜日を計算。存在しなければNone"""
-        # 1日の曜日
-        first = datetime(year, month, 1, tzinfo=tz)
-        # 第1 X曜日
-        days_ahead = weekday - first.weekday()
-        if days_ahead < 0:
-            days_ahead += 7
-        first_target = first + timedelta(days=days_ahead)
-        # 第N
-        result = first_target + timedelta(weeks=nth - 1)
-        if result.month != month:
-            return None
-        return result
-
-    def next_month_year(y: int, m: int):
-        nm = m + 1
-        ny = y
-        if nm > 12:
-            nm = 1
-            ny += 1
-        return ny, nm
-
-    def find_next_nth_weekday(nths: list[int], weekday: int, offset_days: int = 0) -> datetime | None:
-        """複数の第N指定から、now以降の最も近い日を返す"""
-        hour = extract_hour(time_text, default=9)
-        minute = extract_minute(time_text)
-        candidates = []
-        # 今月と来月から候補を集める
-        for y, m_val in [(now.year, now.month), (*next_month_year(now.year, now.month),)]:
-            for n in nths:
-                target = nth_weekday_of_month(y, m_val, n, weekday)
-                if target is not None:
-                    dt = make_dt(target + timedelta(days=offset_days), hour, minute)
-                    if dt > now:
-                        candidates.append(dt)
-        if candidates:
-            return min(candidates)
-        return None
-
     # 毎月第N(,N) X曜日の前日（複数対応）
-    m = re.search(r'毎月\s*第\s*([\d,、]+)\s*([月火水木金土日])\s*曜?日?\s*の?\s*前日', text)
+    m = _RE_MONTHLY_NTH_EVE.search(text)
     if m:
-        nths = [int(n) for n in re.split(r'[,、]', m.group(1)) if n.strip()]
+        nths = [int(n) for n in m.group(1).replace('、', ',').split(',') if n.strip()]
         wd_name = m.group(2)
         target_wd = WEEKDAY_MAP[wd_name]
-        remind_at = find_next_nth_weekday(nths, target_wd, offset_days=-1)
+        remind_at = _find_next_nth_weekday(now, tz, time_text, nths, target_wd, offset_days=-1)
         if remind_at is None:
             return None
         nth_str = ",".join(str(n) for n in nths)
         return {"repeat_type": "monthly", "repeat_value": f"第{nth_str}{wd_name}の前日", "remind_at": remind_at}
 
     # 毎月第N(,N) X曜日（複数対応）
-    m = re.search(r'毎月\s*第\s*([\d,、]+)\s*([月火水木金土日])\s*曜?日?', text)
+    m = _RE_MONTHLY_NTH.search(text)
     if m:
-        nths = [int(n) for n in re.split(r'[,、]', m.group(1)) if n.strip()]
+        nths = [int(n) for n in m.group(1).replace('、', ',').split(',') if n.strip()]
         wd_name = m.group(2)
         target_wd = WEEKDAY_MAP[wd_name]
-        remind_at = find_next_nth_weekday(nths, target_wd)
+        remind_at = _find_next_nth_weekday(now, tz, time_text, nths, target_wd)
         if remind_at is None:
             return None
         nth_str = ",".join(str(n) for n in nths)
         return {"repeat_type": "monthly", "repeat_value": f"第{nth_str}{wd_name}", "remind_at": remind_at}
 
     # 毎月X日
-    m = re.search(r'毎月\s*(\d+)\s*日', text)
+    m = _RE_MONTHLY_DAY.search(text)
     if m:
         day = int(m.group(1))
-        hour = extract_hour(time_text, default=9)
-        minute = extract_minute(time_text)
+        hour, minute = extract_hm(time_text)
         # 今月の指定日
         try:
-            remind_at = make_dt(now.replace(day=day), hour, minute)
+            remind_at = _set_time(now.replace(day=day), hour, minute)
         except ValueError:
             # 日付が無効（31日がない月等）→ 来月
             next_month = now.month + 1
@@ -219,11 +303,11 @@ def parse_repeat_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> dict |
                 next_month = 1
                 year += 1
             try:
-                remind_at = make_dt(datetime(year, next_month, day, tzinfo=tz), hour, minute)
+                remind_at = _set_time(datetime(year, next_month, day, tzinfo=tz), hour, minute)
             except ValueError:
                 # 来月にもその日がない場合 → 月末に調整
                 last_day = calendar.monthrange(year, next_month)[1]
-                remind_at = make_dt(datetime(year, next_month, last_day, tzinfo=tz), hour, minute)
+                remind_at = _set_time(datetime(year, next_month, last_day, tzinfo=tz), hour, minute)
         else:
             if remind_at < now:
                 # 来月
@@ -233,49 +317,46 @@ def parse_repeat_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> dict |
                     next_month = 1
                     year += 1
                 try:
-                    remind_at = make_dt(datetime(year, next_month, day, tzinfo=tz), hour, minute)
+                    remind_at = _set_time(datetime(year, next_month, day, tzinfo=tz), hour, minute)
                 except ValueError:
                     # 来月にもその日がない場合（例: 31日で来月が30日まで）→ 月末に調整
                     last_day = calendar.monthrange(year, next_month)[1]
-                    remind_at = make_dt(datetime(year, next_month, last_day, tzinfo=tz), hour, minute)
+                    remind_at = _set_time(datetime(year, next_month, last_day, tzinfo=tz), hour, minute)
         return {"repeat_type": "monthly", "repeat_value": str(day), "remind_at": remind_at}
 
     # 隔週X曜
-    m = re.search(r'隔週\s*([月火水木金土日])\s*曜?日?', text)
+    m = _RE_BIWEEKLY.search(text)
     if m:
         wd_name = m.group(1)
         target_wd = WEEKDAY_MAP[wd_name]
-        hour = extract_hour(time_text, default=9)
-        minute = extract_minute(time_text)
-        target_date = next_weekday_date(target_wd)
-        remind_at = make_dt(target_date, hour, minute)
+        hour, minute = extract_hm(time_text)
+        target_date = _next_weekday_date(now, target_wd)
+        remind_at = _set_time(target_date, hour, minute)
         return {"repeat_type": "biweekly", "repeat_value": wd_name, "remind_at": remind_at}
 
     # 毎週X曜
-    m = re.search(r'毎週\s*([月火水木金土日])\s*曜?日?', text)
+    m = _RE_WEEKLY.search(text)
     if m:
         wd_name = m.group(1)
         target_wd = WEEKDAY_MAP[wd_name]
-        hour = extract_hour(time_text, default=9)
-        minute = extract_minute(time_text)
-        target_date = next_weekday_date(target_wd)
-        remind_at = make_dt(target_date, hour, minute)
+        hour, minute = extract_hm(time_text)
+        target_date = _next_weekday_date(now, target_wd)
+        remind_at = _set_time(target_date, hour, minute)
         return {"repeat_type": "weekly", "repeat_value": wd_name, "remind_at": remind_at}
 
     # 毎週（曜日なし）→ 今日の曜日
-    if re.search(r'毎週', text):
+    if '毎週' in text:
         wd_name = WEEKDAY_NAMES[now.weekday()]
-        hour = extract_hour(time_text, default=9)
-        minute = extract_minute(time_text)
-        target_date = next_weekday_date(now.weekday())
-        remind_at = make_dt(target_date, hour, minute)
+        hour, minute = extract_hm(time_text)
+        target_date = _next_weekday_date(now, now.weekday())
+        remind_at = _set_time(target_date, hour, minute)
         return {"repeat_type": "weekly", "repeat_value": wd_name, "remind_at": remind_at}
 
     # 毎朝 → daily, デフォルト8:00
     if '毎朝' in text:
         hour = extract_hour(time_text.replace('毎朝', ''), default=8)
         minute = extract_minute(time_text)
-        remind_at = make_dt(now, hour, minute)
+        remind_at = _set_time(now, hour, minute)
         if remind_at < now:
             remind_at += timedelta(days=1)
         return {"repeat_type": "daily", "repeat_value": None, "remind_at": remind_at}
@@ -284,34 +365,32 @@ def parse_repeat_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> dict |
     if '毎晩' in text:
         hour = extract_hour(time_text.replace('毎晩', ''), default=20)
         minute = extract_minute(time_text)
-        remind_at = make_dt(now, hour, minute)
+        remind_at = _set_time(now, hour, minute)
         if remind_at < now:
             remind_at += timedelta(days=1)
         return {"repeat_type": "daily", "repeat_value": None, "remind_at": remind_at}
 
     # 毎夕(方)? → daily, デフォルト17:00
-    if re.search(r'毎夕(方)?', text):
+    if '毎夕' in text:
         hour = extract_hour(time_text.replace('毎夕方', '').replace('毎夕', ''), default=17)
         minute = extract_minute(time_text)
-        remind_at = make_dt(now, hour, minute)
+        remind_at = _set_time(now, hour, minute)
         if remind_at < now:
             remind_at += timedelta(days=1)
         return {"repeat_type": "daily", "repeat_value": None, "remind_at": remind_at}
 
     # 毎日
     if '毎日' in text:
-        hour = extract_hour(time_text, default=9)
-        minute = extract_minute(time_text)
-        remind_at = make_dt(now, hour, minute)
+        hour, minute = extract_hm(time_text)
+        remind_at = _set_time(now, hour, minute)
         if remind_at < now:
             remind_at += timedelta(days=1)
         return {"repeat_type": "daily", "repeat_value": None, "remind_at": remind_at}
 
     # 平日
     if '平日' in text:
-        hour = extract_hour(time_text, default=9)
-        minute = extract_minute(time_text)
-        remind_at = make_dt(now, hour, minute)
+        hour, minute = extract_hm(time_text)
+        remind_at = _set_time(now, hour, minute)
         if remind_at < now or now.weekday() >= 5:
             # 次の平日を探す
             remind_at += timedelta(days=1)
@@ -322,89 +401,101 @@ def parse_repeat_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> dict |
     return None
 
 
-def parse_datetime_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> datetime | None:
-    """正規表現パターンで日時を解析"""
-    text = normalize_numbers(user_input)
+# 相対時間
+_RE_HOURS_HALF_LATER = re.compile(r'(\d+)\s*時間\s*半\s*後')
+_RE_HOURS_LATER = re.compile(r'(\d+)\s*時間\s*後')
+_RE_MIN_LATER = re.compile(r'(\d+)\s*分\s*後')
+_RE_MIN_LEFT = re.compile(r'あと\s*(\d+)\s*分')
+_RE_HOURS_LEFT = re.compile(r'あと\s*(\d+)\s*時間')
+_RE_DAYS_LATER = re.compile(r'(\d+)\s*日\s*後')
+_RE_DAYS_LEFT = re.compile(r'あと\s*(\d+)\s*日')
+_RE_WEEKS_LATER = re.compile(r'(\d+)\s*週間?\s*後')
+# 月・日付指定
+_RE_MONTH_AFTER_NEXT_DAY = re.compile(r'再来月\s*(\d+)\s*日')
+_RE_NEXT_MONTH_DAY = re.compile(r'来月\s*(\d+)\s*日')
+_RE_THIS_MONTH_DAY = re.compile(r'今月\s*(\d+)\s*日')
+_RE_MONTH_DAY = re.compile(r'(\d+)\s*月\s*(\d+)\s*日')
+# 曜日指定（週の指定語は再来週を来週より先に並べる）
+_RE_WEEKDAY_REF = re.compile(r'(?P<week>再来週|来週|今週|次|今度)\s*の?\s*(?P<wd>[月火水木金土日])\s*曜?日?')
+_WEEK_WORD_PRIORITY = {'再来週': 0, '来週': 1, '今週': 2, '次': 3, '今度': 3}
+
+
+def parse_datetime_pattern(user_input: str, now: datetime, tz: ZoneInfo, text: str | None = None) -> datetime | None:
+    """正規表現パターンで日時を解析（text は parse_repeat_pattern と同じく正規化済み入力）"""
+    if text is None:
+        text = normalize_numbers(user_input)
     weekdays = WEEKDAY_MAP
 
-    def make_time(base_date: datetime, t: str, default_hour: int = 9) -> datetime:
-        """日付と時刻を組み合わせる"""
-        hour = extract_hour(t, default_hour)
-        minute = extract_minute(t)
-        return base_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
-
     # === 相対時間 ===
 
-    # X時間半後
-    m = re.search(r'(\d+)\s*時間\s*半\s*後', text)
-    if m:
-        return now + timedelta(hours=int(m.group(1)), minutes=30)
-
-    # X時間後
-    m = re.search(r'(\d+)\s*時間\s*後', text)
-    if m:
-        return now + timedelta(hours=int(m.group(1)))
-
-    # X分後 / あとX分
-    m = re.search(r'(\d+)\s*分\s*後', text) or re.search(r'あと\s*(\d+)\s*分', text)
-    if m:
-        return now + timedelta(minutes=int(m.group(1)))
-
-    # あとX時間
-    m = re.search(r'あと\s*(\d+)\s*時間', text)
-    if m:
-        return now + timedelta(hours=int(m.group(1)))
-
-    # X日後 / あとX日
-    m = re.search(r'(\d+)\s*日\s*後', text) or re.search(r'あと\s*(\d+)\s*日', text)
-    if m:
-        days = int(m.group(1))
-        target = now + timedelta(days=days)
-        return make_time(target, text)
-
-    # X週間後
-    m = re.search(r'(\d+)\s*週間?\s*後', text)
-    if m:
-        weeks = int(m.group(1))
-        target = now + timedelta(weeks=weeks)
-        return make_time(target, text)
+    # 相対時間の表現は必ず「後」か「あと」を含むので、無ければ正規表現を走らせない
+    if '後' in text or 'あと' in text:
+        # X時間半後
+        m = _RE_HOURS_HALF_LATER.search(text)
+        if m:
+            return now + timedelta(hours=int(m.group(1)), minutes=30)
+
+        # X時間後
+        m = _RE_HOURS_LATER.search(text)
+        if m:
+            return now + timedelta(hours=int(m.group(1)))
+
+        # X分後 / あとX分
+        m = _RE_MIN_LATER.search(text) or _RE_MIN_LEFT.search(text)
+        if m:
+            return now + timedelta(minutes=int(m.group(1)))
+
+        # あとX時間
+        m = _RE_HOURS_LEFT.search(text)
+        if m:
+            return now + timedelta(hours=int(m.group(1)))
+
+        # X日後 / あとX日
+        m = _RE_DAYS_LATER.search(text) or _RE_DAYS_LEFT.search(text)
+        if m:
+            days = int(m.group(1))
+            target = now + timedelta(days=days)
+            return _apply_time(target, text)
+
+        # X週間後
+        m = _RE_WEEKS_LATER.search(text)
+        if m:
+            weeks = int(m.group(1))
+            target = now + timedelta(weeks=weeks)
+            return _apply_time(target, text)
 
     # === 特定日付 ===
 
     # 明々後日（しあさって）
     if '明々後日' in text or 'しあさって' in text:
         day = now + timedelta(days=3)
-        return make_time(day, text)
+        return _apply_time(day, text)
 
     # 明後日
     if '明後日' in text:
         day = now + timedelta(days=2)
-        return make_time(day, text)
+        return _apply_time(day, text)
 
     # 明日
     if '明日' in text:
         day = now + timedelta(days=1)
-        return make_time(day, text)
+        return _apply_time(day, text)
 
     # 今日
     if '今日' in text:
-        return make_time(now, text, default_hour=now.hour + 1)
+        return _apply_time(now, text, default_hour=now.hour + 1)
 
     # === 週末 ===
 
     # 来週末
     if '来週末' in text:
-        days_until_monday = (7 - now.weekday()) % 7 or 7
-        next_saturday = now + timedelta(days=days_until_monday + 5)
-        return make_time(next_saturday, text)
-
-    # 今週末 / 週末
-    if '今週末' in text or '週末' in text:
-        if now.weekday() >= 5:  # 土日なら今日
-            saturday = now
-        else:
-            saturday = now + timedelta(days=(5 - now.weekday()))
-        return make_time(saturday, text)
+        next_saturday = now + timedelta(days=_DAYS_AHEAD[now.weekday()][0] + 5)
+        return _apply_time(next_saturday, text)
+
+    # 今週末 / 週末（土日なら今日）
+    if '週末' in text:
+        saturday = now + timedelta(days=_DAYS_TO_WEEKEND[now.weekday()])
+        return _apply_time(saturday, text)
 
     # === 再来月 ===
 
@@ -415,11 +506,7 @@ def parse_datetime_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> date
         while month > 12:
             month -= 12
             year += 1
-        if month == 12:
-            last_day = datetime(year + 1, 1, 1, tzinfo=tz) - timedelta(days=1)
-        else:
-            last_day = datetime(year, month + 1, 1, tzinfo=tz) - timedelta(days=1)
-        return make_time(last_day, text)
+        return _apply_time(_month_end(year, month, tz), text)
 
     # 再来月初
     if '再来月初' in text:
@@ -429,10 +516,10 @@ def parse_datetime_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> date
             month -= 12
             year += 1
         first_day = datetime(year, month, 1, tzinfo=tz)
-        return make_time(first_day, text)
+        return _apply_time(first_day, text)
 
     # 再来月X日
-    m = re.search(r'再来月\s*(\d+)\s*日', text)
+    m = '再来月' in text and _RE_MONTH_AFTER_NEXT_DAY.search(text)
     if m:
         day = int(m.group(1))
         month = now.month + 2
@@ -444,7 +531,7 @@ def parse_datetime_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> date
             target = datetime(year, month, day, tzinfo=tz)
         except ValueError:
             return None
-        return make_time(target, text)
+        return _apply_time(target, text)
 
     # 再来月（日付なし）
     if '再来月' in text:
@@ -454,7 +541,7 @@ def parse_datetime_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> date
             month -= 12
             year += 1
         first_day = datetime(year, month, 1, tzinfo=tz)
-        return make_time(first_day, text)
+        return _apply_time(first_day, text)
 
     # === 月末・月初 ===
 
@@ -465,22 +552,11 @@ def parse_datetime_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> date
         if next_month > 12:
             next_month = 1
             year += 1
-        # 来月の最終日
-        if next_month == 12:
-            last_day = datetime(year + 1, 1, 1, tzinfo=tz) - timedelta(days=1)
-        else:
-            last_day = datetime(year, next_month + 1, 1, tzinfo=tz) - timedelta(days=1)
-        return make_time(last_day, text)
+        return _apply_time(_month_end(year, next_month, tz), text)
 
     # 月末 / 今月末
-    if '月末' in text or '今月末' in text:
-        next_month = now.month + 1
-        year = now.year
-        if next_month > 12:
-            next_month = 1
-            year += 1
-        last_day = datetime(year, next_month, 1, tzinfo=tz) - timedelta(days=1)
-        return make_time(last_day, text)
+    if '月末' in text:
+        return _apply_time(_month_end(now.year, now.month, tz), text)
 
     # 来月初
     if '来月初' in text:
@@ -490,17 +566,17 @@ def parse_datetime_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> date
             next_month = 1
             year += 1
         first_day = datetime(year, next_month, 1, tzinfo=tz)
-        return make_time(first_day, text)
+        return _apply_time(first_day, text)
 
     # 月初 / 今月初
     if '月初' in text:
         first_day = now.replace(day=1)
-        return make_time(first_day, text)
+        return _apply_time(first_day, text)
 
     # === 今月X日 / 来月X日 ===
 
     # 来月X日
-    m = re.search(r'来月\s*(\d+)\s*日', text)
+    m = '来月' in text and _RE_NEXT_MONTH_DAY.search(text)
     if m:
         day = int(m.group(1))
         month = now.month + 1
@@ -512,60 +588,43 @@ def parse_datetime_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> date
             target = datetime(year, month, day, tzinfo=tz)
         except ValueError:
             return None
-        return make_time(target, text)
+        return _apply_time(target, text)
 
     # 今月X日
-    m = re.search(r'今月\s*(\d+)\s*日', text)
+    m = '今月' in text and _RE_THIS_MONTH_DAY.search(text)
     if m:
         day = int(m.group(1))
         try:
             target = now.replace(day=day)
         except ValueError:
             return None
-        return make_time(target, text)
+        return _apply_time(target, text)
 
     # === 曜日 ===
 
-    # 再来週のX曜日
-    m = re.search(r'再来週\s*の?\s*([月火水木金土日])\s*曜?日?', text)
-    if m:
-        target_weekday = weekdays[m.group(1)]
-        days_until_monday = (7 - now.weekday()) % 7 or 7
-        next_next_monday = now + timedelta(days=days_until_monday + 7)
-        target_date = next_next_monday + timedelta(days=target_weekday)
-        return make_time(target_date, text)
-
-    # 来週のX曜日
-    m = re.search(r'来週\s*の?\s*([月火水木金土日])\s*曜?日?', text)
-    if m:
-        target_weekday = weekdays[m.group(1)]
-        days_until_monday = (7 - now.weekday()) % 7 or 7
-        next_monday = now + timedelta(days=days_until_monday)
-        target_date = next_monday + timedelta(days=target_weekday)
-        return make_time(target_date, text)
-
-    # 今週のX曜日
-    m = re.search(r'今週\s*の?\s*([月火水木金土日])\s*曜?日?', text)
-    if m:
-        target_weekday = weekdays[m.group(1)]
-        this_monday = now - timedelta(days=now.weekday())
-        target_date = this_monday + timedelta(days=target_weekday)
-        return make_time(target_date, text)
-
-    # 次のX曜日 / 今度のX曜日
-    m = re.search(r'(次|今度)\s*の?\s*([月火水木金土日])\s*曜?日?', text)
+    # 再来週/来週/今週/次/今度 + X曜日（1回の走査で拾い、複数あれば 再来週 > 来週 > 今週 > 次・今度 の順で採用）
+    m = None
+    if '週' in text or '次' in text or '今度' in text:
+        m = min(_RE_WEEKDAY_REF.finditer(text), key=lambda wm: _WEEK_WORD_PRIORITY[wm.group('week')], default=None)
     if m:
-        target_weekday = weekdays[m.group(2)]
-        days_ahead = target_weekday - now.weekday()
-        if days_ahead <= 0:
-            days_ahead += 7
-        target_date = now + timedelta(days=days_ahead)
-        return make_time(target_date, text)
+        target_weekday = weekdays[m.group('wd')]
+        today = now.weekday()
+        week = m.group('week')
+        if week == '再来週':
+            days = _DAYS_AHEAD[today][0] + 7 + target_weekday
+        elif week == '来週':
+            days = _DAYS_AHEAD[today][0] + target_weekday
+        elif week == '今週':
+            days = target_weekday - today
+        else:
+            # 次のX曜日 / 今度のX曜日
+            days = _DAYS_AHEAD[today][target_weekday]
+        return _apply_time(now + timedelta(days=days), text)
 
     # === 日付指定 ===
 
     # X月X日
-    m = re.search(r'(\d+)\s*月\s*(\d+)\s*日', text)
+    m = '月' in text and _RE_MONTH_DAY.search(text)
     if m:
         month, day = int(m.group(1)), int(m.group(2))
         year = now.year
@@ -575,192 +634,257 @@ def parse_datetime_pattern(user_input: str, now: datetime, tz: ZoneInfo) -> date
                 target = datetime(year + 1, month, day, tzinfo=tz)
         except ValueError:
             return None
-        return make_time(target, text)
+        return _apply_time(target, text)
 
     # === 時刻のみ ===
 
-    # 正午 / お昼
-    if '正午' in text or 'お昼' in text:
-        result = now.replace(hour=12, minute=0, second=0, microsecond=0)
-        if result < now:
-            result += timedelta(days=1)
-        return result
-
-    # 深夜
-    if '深夜' in text:
-        result = now.replace(hour=23, minute=0, second=0, microsecond=0)
-        if result < now:
-            result += timedelta(days=1)
-        return result
-
-    # 午後X時 / 午前X時
-    m = re.search(r'午後\s*(\d+)\s*時', text)
-    if m:
-        hour = int(m.group(1))
-        hour = hour + 12 if hour < 12 else hour
-        minute = extract_minute(text)
-        result = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        if result < now:
-            result += timedelta(days=1)
-        return result
-
-    m = re.search(r'午前\s*(\d+)\s*時', text)
-    if m:
-        hour = int(m.group(1))
-        minute = extract_minute(text)
-        result = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        if result < now:
-            result += timedelta(days=1)
-        return result
-
-    # X時半
-    m = re.search(r'(\d+)\s*時\s*半', text)
-    if m and not any(w in text for w in ['明日', '明後日', '来週', '今週', '次の', '月', '今度']):
-        hour = int(m.group(1))
-        result = now.replace(hour=hour, minute=30, second=0, microsecond=0)
-        if result < now:
-            result += timedelta(days=1)
-        return result
-
-    # X時Y分
-    m = re.search(r'(\d+)\s*時\s*(\d+)\s*分', text)
-    if m and not any(w in text for w in ['明日', '明後日', '来週', '今週', '次の', '月', '今度']):
-        hour, minute = int(m.group(1)), int(m.group(2))
-        result = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        if result < now:
-            result += timedelta(days=1)
-        return result
-
-    # X時（今日または翌日）
-    m = re.search(r'(\d+)\s*時', text)
-    if m and not any(w in text for w in ['明日', '明後日', '来週', '今週', '次の', '月', '今度', '午前', '午後']):
-        hour = int(m.group(1))
-        result = now.replace(hour=hour, minute=0, second=0, microsecond=0)
-        if result < now:
-            result += timedelta(days=1)
-        return result
-
-    # 朝/昼/夕方/夜（単体）
-    time_words = {'朝': 8, '昼': 12, '夕方': 17, '夜': 20}
-    for word, hour in time_words.items():
+    # 正午 / お昼 / 深夜
+    for word, hour in _EXACT_TIME_WORDS:
         if word in text:
-            result = now.replace(hour=hour, minute=0, second=0, microsecond=0)
-            if result < now:
-                result += timedelta(days=1)
-            return result
+            return _next_occurrence(now, hour)
+
+    # 以下は「時」を含む場合のみ
+    if '時' in text:
+        # 午後X時 / 午前X時
+        m = _RE_HOUR_PM.search(text)
+        if m:
+            hour = int(m.group(1))
+            hour = hour + 12 if hour < 12 else hour
+            return _next_occurrence(now, hour, extract_minute(text))
+
+        m = _RE_HOUR_AM.search(text)
+        if m:
+            hour = int(m.group(1))
+            return _next_occurrence(now, hour, extract_minute(text))
+
+        # X時半
+        m = _RE_HALF.search(text)
+        if m and not _RE_DATE_CONTEXT.search(text):
+            return _next_occurrence(now, int(m.group(1)), 30)
+
+        # X時Y分
+        m = _RE_HHMM.search(text)
+        if m and not _RE_DATE_CONTEXT.search(text):
+            return _next_occurrence(now, int(m.group(1)), int(m.group(2)))
+
+        # X時（今日または翌日）
+        m = _RE_HOUR.search(text)
+        if m and not _RE_DATE_OR_MERIDIEM_CONTEXT.search(text):
+            return _next_occurrence(now, int(m.group(1)))
+
+    # 朝/昼/夕方/夜（単体。正午・お昼・深夜は上で処理済み）
+    for word, hour in _TIME_WORDS:
+        if word in text:
+            return _next_occurrence(now, hour)
 
     return None
 
 
-def extract_content(user_input: str) -> str:
-    """ユーザー入力から日時表現を除去してcontentを抽出"""
-    # 「から揚げ」「から拭き」「からし」「からあげ」を保護する「から」
-    _kara = r'から(?!揚|拭|し|あげ)'
-    # 末尾の助詞パターン（「のから」等の二重助詞にも対応、複合語を保護）
-    _p = rf'(の{_kara}|のまでに|のまで|までに|に|{_kara}|まで|で|の)?'
-    # 日付のみ（時刻なし）用の助詞パターン（「にんじん」「でかける」等も保護）
-    _p_date = rf'({_kara}|までに|まで|に(?!ん|こ|が)|で(?!ん|か|き))?'
-    # 時刻コンテキスト語（長い語を先に）
-    _t = r'(朝イチ|朝|夕方|深夜|夜|昼|正午|お昼)'
-
-    patterns = [
-        # 繰り返し表現
-        rf'毎月\s*第\s*[\d,、]+\s*[月火水木金土日]\s*曜?日?\s*の?\s*前日\s*の?\s*({_t}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_p}',
-        rf'毎月\s*第\s*[\d,、]+\s*[月火水木金土日]\s*曜?日?\s*の?\s*({_t}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_p}',
-        rf'毎月\s*\d+\s*日\s*の?\s*({_t}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_p}',
-        rf'(隔週|毎週)\s*[月火水木金土日]?\s*曜?日?\s*の?\s*({_t}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_p}',
-        rf'毎(朝|晩|夕方?|日)\s*の?\s*({_t}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_p}',
-        rf'平日\s*の?\s*({_t}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_p}',
-        rf'\d+\s*日\s*後\s*{_p}',
-        rf'\d+\s*週間?\s*後\s*{_p}',
-        rf'あと\s*\d+\s*日\s*{_p}',
-        rf'\d+\s*時間\s*半?\s*後\s*{_p}',
-        rf'\d+\s*分\s*後\s*{_p}',
-        rf'あと\s*\d+\s*(分|時間)\s*{_p}',
-        # 明日/今日 + 時刻あり → 助詞除去
-        rf'明々?後?日\s*の?\s*{_t}?\s*\d+\s*時\s*半?\s*\d*\s*分?\s*{_p}',
-        rf'今日\s*の?\s*{_t}?\s*\d+\s*時\s*半?\s*\d*\s*分?\s*{_p}',
-        # 明日/今日 + 朝昼夕夜のみ → 助詞除去
-        rf'明々?後?日\s*の?\s*{_t}\s*{_p}',
-        rf'今日\s*の?\s*{_t}\s*{_p}',
-        # 明日/今日のみ（時刻なし）→ 助詞除去（複合語保護付き）
-        rf'明々?後?日(\s*の(?=\s*(\d|朝|昼|夕|夜|午|から|まで)))?\s*{_p_date}',
-        rf'今日(\s*の(?=\s*(\d|朝|昼|夕|夜|午|から|まで)))?\s*{_p_date}',
-        rf'(今|来|再来)週\s*(末|の?\s*[月火水木金土日]\s*曜?日?)?\s*(の?\s*{_t})?\s*\d*\s*時?\s*半?\s*\d*\s*分?\s*{_p}',
-        rf'(次|今度)\s*の?\s*[月火水木金土日]\s*曜?日?\s*(の?\s*{_t})?\s*\d*\s*時?\s*半?\s*\d*\s*分?\s*{_p}',
-        # 再来月X日 / 来月X日 / 今月X日
-        rf'再来月\s*(末|初|\d+\s*日)?\s*の?\s*({_t}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_p}',
-        rf'(今|来)月\s*\d+\s*日\s*の?\s*({_t}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_p}',
+# 「から揚げ」「から拭き」「からし」「からあげ」を保護する「から」
+_KARA = r'から(?!揚|拭|し|あげ)'
+# 末尾の助詞パターン（「のから」等の二重助詞にも対応、複合語を保護）
+_P = rf'(の{_KARA}|のまでに|のまで|までに|に|{_KARA}|まで|で|の)?'
+# 日付のみ（時刻なし）用の助詞パターン（「にんじん」「でかける」等も保護）
+_P_DATE = rf'({_KARA}|までに|まで|に(?!ん|こ|が)|で(?!ん|か|き))?'
+# 時刻コンテキスト語（長い語を先に）
+_T = r'(朝イチ|朝|夕方|深夜|夜|昼|正午|お昼)'
+
+# contentから除去する日時表現（上から順に適用する）
+# 各グループの語をどれも含まない文字列には、そのグループのパターンは一致しない（除去のたびに判定し直す）
+# 2番目の要素が True のグループは全パターンが数字を必須とする
+_CONTENT_PATTERN_GROUPS = [
+    (triggers, needs_digit, [re.compile(p) for p in patterns])
+    for triggers, needs_digit, patterns in (
+    # 繰り返し表現
+    (('毎月',), False, [
+        rf'毎月\s*第\s*[\d,、]+\s*[月火水木金土日]\s*曜?日?\s*の?\s*前日\s*の?\s*({_T}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_P}',
+        rf'毎月\s*第\s*[\d,、]+\s*[月火水木金土日]\s*曜?日?\s*の?\s*({_T}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_P}',
+        rf'毎月\s*\d+\s*日\s*の?\s*({_T}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_P}',
+    ]),
+    (('週',), False, [
+        rf'(隔週|毎週)\s*[月火水木金土日]?\s*曜?日?\s*の?\s*({_T}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_P}',
+    ]),
+    (('毎',), False, [
+        rf'毎(朝|晩|夕方?|日)\s*の?\s*({_T}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_P}',
+    ]),
+    (('平日',), False, [
+        rf'平日\s*の?\s*({_T}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_P}',
+    ]),
+    (('後',), True, [
+        rf'\d+\s*日\s*後\s*{_P}',
+        rf'\d+\s*週間?\s*後\s*{_P}',
+    ]),
+    (('あと',), True, [
+        rf'あと\s*\d+\s*日\s*{_P}',
+    ]),
+    (('後',), True, [
+        rf'\d+\s*時間\s*半?\s*後\s*{_P}',
+        rf'\d+\s*分\s*後\s*{_P}',
+    ]),
+    (('あと',), True, [
+        rf'あと\s*\d+\s*(分|時間)\s*{_P}',
+    ]),
+    # 明日/今日 + 時刻あり → 助詞除去
+    (('明',), True, [
+        rf'明々?後?日\s*の?\s*{_T}?\s*\d+\s*時\s*半?\s*\d*\s*分?\s*{_P}',
+    ]),
+    (('今日',), True, [
+        rf'今日\s*の?\s*{_T}?\s*\d+\s*時\s*半?\s*\d*\s*分?\s*{_P}',
+    ]),
+    # 明日/今日 + 朝昼夕夜のみ → 助詞除去
+    (('明',), False, [
+        rf'明々?後?日\s*の?\s*{_T}\s*{_P}',
+    ]),
+    (('今日',), False, [
+        rf'今日\s*の?\s*{_T}\s*{_P}',
+    ]),
+    # 明日/今日のみ（時刻なし）→ 助詞除去（複合語保護付き）
+    (('明',), False, [
+        rf'明々?後?日(\s*の(?=\s*(\d|朝|昼|夕|夜|午|から|まで)))?\s*{_P_DATE}',
+    ]),
+    (('今日',), False, [
+        rf'今日(\s*の(?=\s*(\d|朝|昼|夕|夜|午|から|まで)))?\s*{_P_DATE}',
+    ]),
+    (('週',), False, [
+        rf'(今|来|再来)週\s*(末|の?\s*[月火水木金土日]\s*曜?日?)?\s*(の?\s*{_T})?\s*\d*\s*時?\s*半?\s*\d*\s*分?\s*{_P}',
+    ]),
+    (('次', '今度'), False, [
+        rf'(次|今度)\s*の?\s*[月火水木金土日]\s*曜?日?\s*(の?\s*{_T})?\s*\d*\s*時?\s*半?\s*\d*\s*分?\s*{_P}',
+    ]),
+    # 再来月X日 / 来月X日 / 今月X日
+    (('再来月',), False, [
+        rf'再来月\s*(末|初|\d+\s*日)?\s*の?\s*({_T}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_P}',
+    ]),
+    (('月',), False, [
+        rf'(今|来)月\s*\d+\s*日\s*の?\s*({_T}\s*)?\d*\s*時?\s*半?\s*\d*\s*分?\s*{_P}',
         # X月X日を先に処理（「(今|来)?月」が「2月」の月を食わないように）
-        rf'\d+\s*月\s*\d+\s*日\s*(の?\s*{_t})?\s*\d*\s*時?\s*半?\s*\d*\s*分?\s*{_p}',
-        rf'(今|来)?月\s*(末|初)?\s*の?\s*{_t}?\s*\d*\s*時?\s*{_p}',
-        rf'午前\s*\d+\s*時\s*半?\s*\d*\s*分?\s*{_p}',
-        rf'午後\s*\d+\s*時\s*半?\s*\d*\s*分?\s*{_p}',
-        rf'\d+\s*時\s*半?\s*\d*\s*分?\s*{_p}',
-        rf'{_t}(?=\s|に|で|の|から|まで|\d|$)\s*{_p}',
-        rf'週末\s*{_p}',
-    ]
-
-    content = normalize_numbers(user_input)
-    for pattern in patterns:
-        content = re.sub(pattern, '', content)
-
-    # 除去後に残った先頭の孤立助詞を除去（複合語保護付き）
-    content = re.sub(r'^[のにでへ]\s+', '', content)
-    content = re.sub(r'^に(?!ん|こ|が|ち|く|し|せ|ほ|っ|ぎ|じ)', '', content)
-    content = re.sub(r'^で(?!ん|か|き|す|し|も|は)', '', content)
-    content = re.sub(r'^の(?!り|ん|び|こ|ど|む|ぼ)', '', content)
-    content = re.sub(r'^へ(?!ん|や|た|え)', '', content)
-    content = re.sub(r'\s+', ' ', content).strip()
+        rf'\d+\s*月\s*\d+\s*日\s*(の?\s*{_T})?\s*\d*\s*時?\s*半?\s*\d*\s*分?\s*{_P}',
+        rf'(今|来)?月\s*(末|初)?\s*の?\s*{_T}?\s*\d*\s*時?\s*{_P}',
+    ]),
+    (('午前',), True, [
+        rf'午前\s*\d+\s*時\s*半?\s*\d*\s*分?\s*{_P}',
+    ]),
+    (('午後',), True, [
+        rf'午後\s*\d+\s*時\s*半?\s*\d*\s*分?\s*{_P}',
+    ]),
+    (('時',), True, [
+        rf'\d+\s*時\s*半?\s*\d*\s*分?\s*{_P}',
+    ]),
+    (('朝', '夕方', '夜', '昼', '正午'), False, [
+        rf'{_T}(?=\s|に|で|の|から|まで|\d|$)\s*{_P}',
+    ]),
+    (('週末',), False, [
+        rf'週末\s*{_P}',
+    ]),
+)]
+
+# 数字を含むかの判定（数字必須グループの事前チェック用）
+_HAS_DIGIT = re.compile(r'\d').search
+
+# 除去後に残った先頭の孤立助詞（複合語保護付き）と空白の連続
+_LEADING_PARTICLE_PATTERNS = [
+    re.compile(r'^[のにでへ]\s+'),
+    re.compile(r'^に(?!ん|こ|が|ち|く|し|せ|ほ|っ|ぎ|じ)'),
+    re.compile(r'^で(?!ん|か|き|す|し|も|は)'),
+    re.compile(r'^の(?!り|ん|び|こ|ど|む|ぼ)'),
+    re.compile(r'^へ(?!ん|や|た|え)'),
+]
+_RE_SPACES = re.compile(r'\s+')
+
+
+def extract_content(user_input: str, text: str | None = None) -> str:
+    """ユーザー入力から日時表現を除去してcontentを抽出（text は正規化済み入力）"""
+    content = normalize_numbers(user_input) if text is None else text
+    # 除去は削るだけなので、最初に数字がなければ数字必須のグループは最後までマッチしない
+    has_digit = _HAS_DIGIT(content) is not None
+    for triggers, needs_digit, patterns in _CONTENT_PATTERN_GROUPS:
+        if (has_digit or not needs_digit) and any(map(content.__contains__, triggers)):
+            for pattern in patterns:
+                content = pattern.sub('', content)
+
+    # 除去後に残った先頭の孤立助詞を除去
+    for pattern in _LEADING_PARTICLE_PATTERNS:
+        content = pattern.sub('', content)
+    content = _RE_SPACES.sub(' ', content).strip()
     return content if content else user_input
 
 
-async def parse_datetime_llm(user_input: str, now: datetime, tz: ZoneInfo) -> datetime | None:
-    """LLMで日時を解析（フォールバック用）"""
+@functools.lru_cache(maxsize=4)
+def _llm_prompt_header(now_minute: datetime, with_next_week: bool) -> str:
+    """LLMプロンプトの現在日時部分（分単位で同じ内容になるのでキャッシュ）
+
+    来週の日付表は曜日・週の指定がある入力のときだけ付ける（プロンプトを短くする）。
+    """
     weekday_ja = ["月", "火", "水", "木", "金", "土", "日"]
 
-    days_until_monday = (7 - now.weekday()) % 7 or 7
-    next_monday = now + timedelta(days=days_until_monday)
-    next_week = {d: (next_monday + timedelta(days=i)).strftime('%Y-%m-%d') for i, d in enumerate(weekday_ja)}
+    header = f"""日時を解析してISO8601形式で返してください。
 
-    prompt = f"""日時を解析してISO8601形式で返してください。
+現在: {now_minute.strftime('%Y-%m-%d')} ({weekday_ja[now_minute.weekday()]}曜) {now_minute.strftime('%H:%M')}"""
+    if not with_next_week:
+        return header
 
-現在: {now.strftime('%Y-%m-%d')} ({weekday_ja[now.weekday()]}曜) {now.strftime('%H:%M')}
-来週: 月={next_week['月']}, 火={next_week['火']}, 水={next_week['水']}, 木={next_week['木']}, 金={next_week['金']}, 土={next_week['土']}, 日={next_week['日']}
+    next_monday = now_minute + timedelta(days=_DAYS_AHEAD[now_minute.weekday()][0])
+    next_week = ", ".join(f"{d}={(next_monday + timedelta(days=i)).strftime('%Y-%m-%d')}" for i, d in enumerate(weekday_ja))
+    return f"{header}\n来週: {next_week}"
 
-入力: {user_input}"""
 
+async def _request_tool_arguments(prompt: str) -> dict | None:
+    """LLMにツール呼び出しを要求し、引数をストリームで受け取る
+
+    引数がJSONとして揃った時点でストリームを打ち切って返す。ツール呼び出しが無ければNone。
+    """
+    stream = await _get_client().chat.completions.create(
+        model="llama-3.1-8b-instant",
+        messages=[{"role": "user", "content": prompt}],
+        tools=_LLM_TOOLS,
+        tool_choice=_LLM_TOOL_CHOICE,
+        # 応答はツール呼び出しのJSONだけなので短く打ち切り、結果も固定する
+        max_tokens=64,
+        temperature=0,
+        stream=True,
+        timeout=10,
+    )
+    arguments = ""
     try:
-        # 同期APIをスレッドで実行し、タイムアウト付きで待機
-        loop = asyncio.get_running_loop()
-        response = await asyncio.wait_for(
-            loop.run_in_executor(
-                None,
-                lambda: _get_client().chat.completions.create(
-                    model="llama-3.1-8b-instant",
-                    messages=[{"role": "user", "content": prompt}],
-                    tools=[PARSE_DATETIME_TOOL],
-                    tool_choice={"type": "function", "function": {"name": "set_datetime"}},
-                    timeout=10,
-                ),
-            ),
-            timeout=15.0,
-        )
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.tool_calls:
+                continue
+            function = chunk.choices[0].delta.tool_calls[0].function
+            if function is None or not function.arguments:
+                continue
+            arguments += function.arguments
+            if arguments.rstrip().endswith("}"):
+                try:
+                    return json.loads(arguments)
+                except ValueError:
+                    pass  # まだ途中（値の中の「}」）
+    finally:
+        await stream.close()
+    return json.loads(arguments) if arguments else None
 
-        message = response.choices[0].message
-        if message.tool_calls:
-            args = json.loads(message.tool_calls[0].function.arguments)
-            dt_str = args.get("datetime", "")
-            logger.info(f"LLM解析結果: {dt_str}")
-            try:
-                result = datetime.fromisoformat(dt_str)
-                if result.tzinfo is None:
-                    result = result.replace(tzinfo=tz)
-                return result
-            except ValueError:
-                logger.warning(f"LLM応答の日時パース失敗: {dt_str}")
-                return None
-        return None
+
+async def parse_datetime_llm(user_input: str, now: datetime, tz: ZoneInfo) -> datetime | None:
+    """LLMで日時を解析（フォールバック用）"""
+    with_next_week = '曜' in user_input or '週' in user_input
+    prompt = f"""{_llm_prompt_header(now.replace(second=0, microsecond=0), with_next_week)}
+
+入力: {user_input}"""
+
+    try:
+        # 非同期クライアントで呼び出し、タイムアウト付きで待機
+        args = await asyncio.wait_for(_request_tool_arguments(prompt), timeout=15.0)
+        if args is None:
+            return None
+        dt_str = args.get("datetime", "")
+        logger.info(f"LLM解析結果: {dt_str}")
+        try:
+            result = datetime.fromisoformat(dt_str)
+            if result.tzinfo is None:
+                result = result.replace(tzinfo=tz)
+            return result
+        except ValueError:
+            logger.warning(f"LLM応答の日時パース失敗: {dt_str}")
+            return None
     except asyncio.TimeoutError:
         logger.error(f"LLM解析タイムアウト: {user_input}")
         return None
@@ -769,30 +893,92 @@ async def parse_datetime_llm(user_input: str, now: datetime, tz: ZoneInfo) -> da
         return None
 
 
-async def parse_reminder_input(user_input: str) -> dict | None:
+# 実行中のLLM解析（同一入力・同一分の同時リクエストで1回の呼び出しを共有）
+_llm_inflight: dict[tuple[str, str], asyncio.Future] = {}
+# LLM解析結果のLRUキャッシュ（全角数字・空白・大文字小文字だけが違う入力も同じ結果を使う）
+_LLM_CACHE_MAXSIZE = 256
+_llm_cache: OrderedDict[tuple[str, str], datetime] = OrderedDict()
+
+
+def _llm_cache_key(user_input: str, now: datetime) -> tuple[str, str]:
+    """LLM解析の共有・キャッシュ用キー（正規化した入力 + 現在時刻の分）"""
+    normalized = _RE_SPACES.sub(' ', user_input.translate(_ZEN2HAN)).strip().lower()
+    return normalized, now.strftime('%Y%m%d%H%M')
+
+
+async def _parse_datetime_llm_shared(user_input: str, now: datetime, tz: ZoneInfo) -> datetime | None:
+    """parse_datetime_llmを同時実行中・解析済みの同一リクエストと共有して呼び出す"""
+    key = _llm_cache_key(user_input, now)
+    cached = _llm_cache.get(key)
+    if cached is not None:
+        _llm_cache.move_to_end(key)
+        return cached
+
+    task = _llm_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(parse_datetime_llm(user_input, now, tz))
+        _llm_inflight[key] = task
+        task.add_done_callback(lambda _: _llm_inflight.pop(key, None))
+    # 1つの待機側がキャンセルされても他の待機側に影響させない
+    result = await asyncio.shield(task)
+    if result is not None:
+        _llm_cache[key] = result
+        if len(_llm_cache) > _LLM_CACHE_MAXSIZE:
+            _llm_cache.popitem(last=False)
+    return result
+
+
+# 解析結果のLRUキャッシュ（キー: 入力文字列 + 現在時刻の分。「30分後」等の相対表現も分単位で正しく扱える）
+_PARSE_CACHE_MAXSIZE = 512
+_parse_cache: OrderedDict[tuple[str, str], ParsedReminder] = OrderedDict()
+
+
+async def parse_reminder_input(user_input: str) -> ParsedReminder | None:
     """ユーザー入力を解析してリマインダー情報を抽出"""
-    tz = ZoneInfo(TIMEZONE)
+    tz = TZ
     now = datetime.now(tz)
 
+    # 前後の空白だけが違う入力は同じキャッシュを使う
+    # （大文字小文字は内容としてそのまま残るので区別する）
+    user_input = user_input.strip()
+    key = (user_input, now.strftime('%Y%m%d%H%M'))
+    cached = _parse_cache.get(key)
+    if cached is not None:
+        _parse_cache.move_to_end(key)
+        return cached
+
+    result = await _parse_reminder_input(user_input, now, tz)
+    if result is not None:
+        _parse_cache[key] = result
+        if len(_parse_cache) > _PARSE_CACHE_MAXSIZE:
+            _parse_cache.popitem(last=False)
+    return result
+
+
+async def _parse_reminder_input(user_input: str, now: datetime, tz: ZoneInfo) -> ParsedReminder | None:
+    """parse_reminder_inputの本体（キャッシュなし）"""
+    # 数字の正規化とcontent抽出は1回だけ行い、各解析関数で使い回す
+    text = normalize_numbers(user_input)
+    content = extract_content(user_input, text)
+
     # 先に繰り返しパターンをチェック
-    repeat_result = parse_repeat_pattern(user_input, now, tz)
+    repeat_result = parse_repeat_pattern(user_input, now, tz, text, content)
     if repeat_result:
-        content = extract_content(user_input)
-        return {
-            "content": content,
-            "datetime": repeat_result["remind_at"],
-            "repeat_type": repeat_result["repeat_type"],
-            "repeat_value": repeat_result.get("repeat_value"),
-        }
+        return ParsedReminder(
+            content=content,
+            remind_at=repeat_result["remind_at"],
+            repeat_type=repeat_result["repeat_type"],
+            repeat_value=repeat_result.get("repeat_value"),
+        )
 
     # まずパターンマッチで解析
-    remind_at = parse_datetime_pattern(user_input, now, tz)
+    remind_at = parse_datetime_pattern(user_input, now, tz, text)
 
     # パターンで解析できなければLLMにフォールバック
     if remind_at is None:
         logger.info(f"パターンマッチ失敗、LLMで解析: {user_input}")
         llm_fallback_logger.info(f"入力: {user_input}")
-        remind_at = await parse_datetime_llm(user_input, now, tz)
+        remind_at = await _parse_datetime_llm_shared(user_input, now, tz)
         if remind_at:
             llm_fallback_logger.info(f"LLM解析成功: {user_input} -> {remind_at.isoformat()}")
         else:
@@ -801,9 +987,4 @@ async def parse_reminder_input(user_input: str) -> dict | None:
     if remind_at is None:
         return None
 
-    content = extract_content(user_input)
-
-    return {
-        "content": content,
-        "datetime": remind_at,
-    }
+    return ParsedReminder(content=content, remind_at=remind_at)
@@ -3,6 +3,7 @@
 import logging
 import os
 import sys
+import time
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
@@ -83,20 +84,11 @@ def _acquire_lock():
 
 def main():
     """メインエントリーポイント（クラッシュ時自動再起動）"""
-    import time
-
     max_retries = 5
     retry_window = 300  # 5分以内に連続クラッシュしたらカウント
     retry_count = 0
     last_crash = 0
 
-    # ヘルスエンドポイント起動
-    try:
-        from health_server import start_health_server
-        start_health_server(port=18791)
-    except Exception as e:
-        logger.warning(f"Health server failed to start: {e}")
-
     while True:
         _acquire_lock()
         logger.info("リマインダーBot起動中...")
@@ -4,19 +4,29 @@ import asyncio
 import logging
 import re
 from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
 
+import aiosqlite
 import discord
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
-from config import SCHEDULER_CHECK_INTERVAL_SEC, TIMEZONE
+from config import (
+    DB_OPTIMIZE_INTERVAL_MIN,
+    SCHEDULER_CHECK_INTERVAL_SEC,
+    SCHEDULER_RESYNC_INTERVAL_MIN,
+    TIMEZONE,
+)
 from database import (
     deactivate_reminder,
     get_due_reminders,
-    update_reminder_time,
+    next_due_at,
+    optimize_db,
+    snooze_reminder,
+    update_reminder_times_bulk,
+    wait_for_reminder_change,
 )
-from utils import WEEKDAY_JA, format_remaining, format_repeat_label
+from utils import TZ, format_remaining, format_repeat_label, format_short_datetime, from_epoch
 
 logger = logging.getLogger(__name__)
 
@@ -30,30 +40,111 @@ class ReminderScheduler:
     def __init__(self, bot: discord.Client):
         self.bot = bot
         self.scheduler = AsyncIOScheduler(timezone=TIMEZONE)
-        self.tz = ZoneInfo(TIMEZONE)
+        self.tz = TZ
+        # Botのキャッシュに無くAPIで取得したチャンネル（毎回のfetchを避ける）
+        self._fetched_channels: dict[int, discord.abc.Messageable] = {}
+        self._watch_task: asyncio.Task | None = None
+        self._checking = False
+
+    def forget_channel(self, channel_id: int):
+        """取得済みチャンネルのキャッシュを破棄"""
+        self._fetched_channels.pop(channel_id, None)
 
     async def start(self):
         """スケジューラを開始"""
-        # 定期チェックジョブを追加
+        # 統計情報を定期更新し、インデックスを使った実行計画を維持する
         self.scheduler.add_job(
-            self.check_and_send_reminders,
-            trigger=IntervalTrigger(seconds=SCHEDULER_CHECK_INTERVAL_SEC),
-            id="reminder_checker",
+            self.optimize_database,
+            trigger=IntervalTrigger(minutes=DB_OPTIMIZE_INTERVAL_MIN),
+            id="db_optimizer",
+            replace_existing=True,
+        )
+        # 安全網: 変更通知の監視が止まっても、新しいリマインダーが一定時間内にスケジュールされるようにする
+        self.scheduler.add_job(
+            self.resync_next_check,
+            trigger=IntervalTrigger(minutes=SCHEDULER_RESYNC_INTERVAL_MIN),
+            id="reminder_resync",
             replace_existing=True,
         )
         self.scheduler.start()
-        logger.info(f"スケジューラ開始（チェック間隔: {SCHEDULER_CHECK_INTERVAL_SEC}秒）")
+        logger.info("スケジューラ開始（次回通知時刻にチェック）")
 
         # 起動時に即座にチェック（Bot停止中に期限を迎えたリマインダーを拾う）
         await self.check_and_send_reminders()
+        self._watch_task = asyncio.create_task(self._watch_reminder_changes())
 
     async def stop(self):
         """スケジューラを停止"""
+        if self._watch_task:
+            self._watch_task.cancel()
         self.scheduler.shutdown(wait=True)
         logger.info("スケジューラ停止")
 
+    async def optimize_database(self):
+        """PRAGMA optimize を実行"""
+        try:
+            await optimize_db()
+        except Exception as e:
+            logger.error(f"DB最適化エラー: {e}")
+
+    async def resync_next_check(self):
+        """次回チェック時刻を再計算（チェック中なら終了時に再計算されるので何もしない）"""
+        if self._checking:
+            return
+        try:
+            await self._schedule_next_check()
+        except Exception as e:
+            logger.error(f"次回チェック設定エラー: {e}", exc_info=True)
+
+    async def _watch_reminder_changes(self):
+        """リマインダーの追加・時刻変更のたびに次回チェック時刻を再計算"""
+        while True:
+            try:
+                await wait_for_reminder_change()
+            except Exception as e:
+                # 監視タスクが黙って止まらないよう記録して待ち直す（その間は定期再計算が拾う）
+                logger.error(f"リマインダー変更の監視エラー: {e}", exc_info=True)
+                await asyncio.sleep(SCHEDULER_CHECK_INTERVAL_SEC)
+                continue
+            await self.resync_next_check()
+
+    async def _schedule_next_check(self, after_check: bool = False):
+        """次に期限を迎えるリマインダーの時刻にチェックジョブを設定（無ければ待機）"""
+        next_at = await next_due_at()
+        if next_at is None:
+            if self.scheduler.get_job("reminder_checker"):
+                self.scheduler.remove_job("reminder_checker")
+            return
+
+        if next_at.tzinfo is None:
+            next_at = next_at.replace(tzinfo=self.tz)
+        now = datetime.now(self.tz)
+        if after_check and next_at <= now:
+            # チェック直後なのに期限切れが残っている（送信失敗など）場合は間隔を空けて再試行
+            next_at = now + timedelta(seconds=SCHEDULER_CHECK_INTERVAL_SEC)
+
+        self.scheduler.add_job(
+            self.check_and_send_reminders,
+            trigger=DateTrigger(run_date=next_at),
+            id="reminder_checker",
+            replace_existing=True,
+            misfire_grace_time=None,
+        )
+
     async def check_and_send_reminders(self):
-        """期限が来たリマインダーをチェックして通知"""
+        """期限が来たリマインダーをチェックして通知し、次回チェックを設定"""
+        self._checking = True
+        try:
+            await self._send_due_reminders()
+        finally:
+            self._checking = False
+            try:
+                await self._schedule_next_check(after_check=True)
+            except Exception as e:
+                logger.error(f"次回チェック設定エラー: {e}", exc_info=True)
+
+    async def _send_due_reminders(self):
+        """期限が来たリマインダーを通知"""
         try:
             now = datetime.now(self.tz)
             due_reminders = await get_due_reminders(now)
@@ -65,12 +156,17 @@ class ReminderScheduler:
             return
 
         semaphore = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+        # 繰り返しの次回日時は送信後に集め、最後に1回のUPDATEでまとめて反映する
+        # 取得時の remind_at も渡し、送信中にスヌーズ等で変わった行は上書きしない
+        reschedules: list[tuple[int, datetime, int]] = []
 
-        async def _process_one(reminder: dict):
+        async def _process_one(reminder: aiosqlite.Row):
             async with semaphore:
                 try:
                     await self.send_reminder(reminder)
-                    await self.handle_after_send(reminder)
+                    next_time = await self.handle_after_send(reminder)
+                    if next_time:
+                        reschedules.append((reminder["id"], next_time, reminder["remind_at"]))
                 except Exception as e:
                     logger.error(f"リマインダー送信エラー (ID={reminder['id']}): {e}", exc_info=True)
                     # 送信後処理で失敗した場合もデータ不整合を防ぐ
@@ -86,15 +182,31 @@ class ReminderScheduler:
         except TimeoutError:
             logger.warning(f"リマインダー送信処理がタイムアウト（60秒、{len(due_reminders)}件）")
 
-    async def send_reminder(self, reminder: dict):
+        if reschedules:
+            try:
+                updated = await update_reminder_times_bulk(reschedules)
+                for reminder_id, next_time, _ in reschedules:
+                    logger.info(f"次回リマインダー更新: ID={reminder_id}, next={next_time}")
+                if updated < len(reschedules):
+                    logger.info(f"送信中に時刻が変更されたため次回更新をスキップ: {len(reschedules) - updated}件")
+            except Exception as e:
+                logger.error(f"次回リマインダー更新失敗: {e}", exc_info=True)
+                for reminder_id, _, _ in reschedules:
+                    try:
+                        await deactivate_reminder(reminder_id)
+                    except Exception:
+                        logger.error(f"非アクティブ化にも失敗 (ID={reminder_id})")
+
+    async def send_reminder(self, reminder: aiosqlite.Row):
         """リマインダーを送信"""
         channel_id = int(reminder["channel_id"])
         user_id = int(reminder["user_id"])
 
-        channel = self.bot.get_channel(channel_id)
+        channel = self.bot.get_channel(channel_id) or self._fetched_channels.get(channel_id)
         if not channel:
             try:
                 channel = await self.bot.fetch_channel(channel_id)
+                self._fetched_channels[channel_id] = channel
             except (discord.NotFound, discord.Forbidden, discord.HTTPException) as e:
                 logger.warning(f"チャンネル取得失敗: {channel_id}, error={e}")
                 await deactivate_reminder(reminder["id"])
@@ -109,28 +221,23 @@ class ReminderScheduler:
         embed.set_footer(text="リマインダー通知")
 
         # 繰り返し情報と次回通知を追加
-        repeat_type = reminder.get("repeat_type")
-        if repeat_type and repeat_type != "none":
-            repeat_text = self._format_repeat(repeat_type, reminder.get("repeat_value"))
+        repeat_type = reminder["repeat_type"]
+        if repeat_type:
+            repeat_text = self._format_repeat(repeat_type, reminder["repeat_value"])
             embed.add_field(name="繰り返し", value=repeat_text, inline=True)
 
             # 次回通知日時を計算して表示
-            current_time = datetime.fromisoformat(reminder["remind_at"])
-            if current_time.tzinfo is None:
-                current_time = current_time.replace(tzinfo=self.tz)
-            else:
-                current_time = current_time.astimezone(self.tz)
-            next_time = self._calculate_next_time(current_time, repeat_type, reminder.get("repeat_value"))
+            current_time = from_epoch(reminder["remind_at"])
+            next_time = self._calculate_next_time(current_time, repeat_type, reminder["repeat_value"])
             if next_time:
-                wd = WEEKDAY_JA[next_time.weekday()]
                 embed.add_field(
                     name="次回通知",
-                    value=f"{next_time.strftime('%m/%d')} ({wd}) {next_time.strftime('%H:%M')}",
+                    value=format_short_datetime(next_time),
                     inline=True,
                 )
 
         # スヌーズボタンを作成
-        is_recurring = bool(reminder.get("repeat_type") and reminder["repeat_type"] != "none")
+        is_recurring = bool(reminder["repeat_type"])
         view = SnoozeView(reminder["id"], bot=self.bot, is_recurring=is_recurring)
 
         try:
@@ -141,37 +248,27 @@ class ReminderScheduler:
             logger.info(f"リマインダー送信: ID={reminder['id']}, user={user_id}")
         except discord.Forbidden:
             logger.warning(f"メッセージ送信権限がありません: channel={channel_id}")
+            self.forget_channel(channel_id)
             await deactivate_reminder(reminder["id"])
 
-    async def handle_after_send(self, reminder: dict):
-        """送信後の処理（繰り返し更新 or 非アクティブ化）"""
-        repeat_type = reminder.get("repeat_type")
+    async def handle_after_send(self, reminder: aiosqlite.Row) -> datetime | None:
+        """送信後の処理（繰り返しなら次回日時を返す、それ以外は非アクティブ化）"""
+        repeat_type = reminder["repeat_type"]
 
-        if not repeat_type or repeat_type == "none":
+        if not repeat_type:
             # 繰り返しなし → 非アクティブ化
             await deactivate_reminder(reminder["id"])
         else:
             # 繰り返しあり → 次回日時を計算
-            current_time = datetime.fromisoformat(reminder["remind_at"])
-            if current_time.tzinfo is None:
-                # naive datetimeをタイムゾーン付きに正しく変換
-                current_time = current_time.replace(tzinfo=self.tz)
-            else:
-                # タイムゾーン付きの場合は正しく変換
-                current_time = current_time.astimezone(self.tz)
+            current_time = from_epoch(reminder["remind_at"])
 
-            next_time = self._calculate_next_time(current_time, repeat_type, reminder.get("repeat_value"))
+            next_time = self._calculate_next_time(current_time, repeat_type, reminder["repeat_value"])
 
             if next_time:
-                success = await update_reminder_time(reminder["id"], next_time)
-                if success:
-                    logger.info(f"次回リマインダー更新: ID={reminder['id']}, next={next_time}")
-                else:
-                    logger.error(f"次回リマインダー更新失敗: ID={reminder['id']}")
-                    await deactivate_reminder(reminder["id"])
-            else:
-                logger.warning(f"次回日時計算不能: ID={reminder['id']}, type={repeat_type}")
-                await deactivate_reminder(reminder["id"])
+                return next_time
+            logger.warning(f"次回日時計算不能: ID={reminder['id']}, type={repeat_type}")
+            await deactivate_reminder(reminder["id"])
+        return None
 
     def _calculate_next_time(
         self, current: datetime, repeat_type: str, repeat_value: str | None
@@ -313,8 +410,6 @@ class SnoozeView(discord.ui.View):
 
     @discord.ui.button(label="完了", style=discord.ButtonStyle.success)
     async def mark_done(self, interaction: discord.Interaction, button: discord.ui.Button):
-        from database import deactivate_reminder
-
         await deactivate_reminder(self.reminder_id)
         await interaction.response.send_message(
             "リマインダーの繰り返しを停止しました。今後は通知されません。",
@@ -325,17 +420,13 @@ class SnoozeView(discord.ui.View):
         await interaction.message.edit(view=self)
 
     async def _snooze(self, interaction: discord.Interaction, minutes: int):
-        from database import snooze_reminder
-
-        tz = ZoneInfo(TIMEZONE)
-        new_time = datetime.now(tz) + timedelta(minutes=minutes)
+        new_time = datetime.now(TZ) + timedelta(minutes=minutes)
         success = await snooze_reminder(self.reminder_id, new_time)
 
         if success:
-            wd = WEEKDAY_JA[new_time.weekday()]
             remaining = format_remaining(new_time)
             await interaction.response.send_message(
-                f"リマインダーを {new_time.strftime('%m/%d')} ({wd}) {new_time.strftime('%H:%M')} に再通知します。（{remaining}）",
+                f"リマインダーを {format_short_datetime(new_time)} に再通知します。（{remaining}）",
                 ephemeral=True,
             )
         else:
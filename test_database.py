@@ -0,0 +1,196 @@
+"""databaseのマイグレーション・ページング・一括更新テスト（一時ファイルのSQLiteを使う）"""
+
+import asyncio
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import database
+from utils import from_epoch
+
+TZ = ZoneInfo("Asia/Tokyo")
+
+# remind_at をISO文字列で保存していた頃のテーブル（error_count 追加前）
+_LEGACY_SCHEMA = """
+CREATE TABLE reminders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    guild_id TEXT,
+    channel_id TEXT NOT NULL,
+    content TEXT NOT NULL,
+    remind_at DATETIME NOT NULL,
+    repeat_type TEXT,
+    repeat_value TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    is_active INTEGER DEFAULT 1
+);
+"""
+
+
+async def _use_db(path: Path):
+    """テスト用のDBファイルに接続先を切り替える"""
+    await database.close_db()
+    database.DB_PATH = path
+
+
+async def _test_migration(tmp: Path, failures: list[str]) -> int:
+    """ISO文字列の remind_at を整数に変換し、不正値の行だけ無効化して起動を続ける"""
+    path = tmp / "legacy.db"
+    legacy = sqlite3.connect(path)
+    legacy.executescript(_LEGACY_SCHEMA)
+    legacy.executemany(
+        "INSERT INTO reminders (user_id, channel_id, content, remind_at) VALUES (?, ?, ?, ?)",
+        [
+            ("1", "10", "タイムゾーン付き", "2026-01-29T18:00:00+09:00"),
+            ("1", "10", "タイムゾーンなし", "2026-01-29T09:30:00"),
+            ("1", "10", "不正値", "not-a-date"),
+        ],
+    )
+    legacy.commit()
+    legacy.close()
+
+    await _use_db(path)
+    try:
+        await database.init_db()
+    except Exception as e:
+        failures.append(f"  移行 NG: init_db -> {type(e).__name__}: {e}")
+        return 1
+
+    # (content, remind_at, is_active, error_count)
+    expected = [
+        ("タイムゾーン付き", int(datetime(2026, 1, 29, 18, 0, tzinfo=TZ).timestamp()), 1, 0),
+        ("タイムゾーンなし", int(datetime(2026, 1, 29, 9, 30, tzinfo=TZ).timestamp()), 1, 0),
+        ("不正値", "not-a-date", 0, 0),
+    ]
+    db = await database._get_db()
+    cursor = await db.execute("SELECT content, remind_at, is_active, error_count FROM reminders ORDER BY id")
+    actual = [tuple(row) for row in await cursor.fetchall()]
+    total = len(expected)
+    for exp, act in zip(expected, actual + [None] * (total - len(actual))):
+        if exp != act:
+            failures.append(f"  移行 NG: {act} (expected {exp})")
+
+    # 2回目の起動でも失敗しない
+    total += 1
+    await _use_db(path)
+    try:
+        await database.init_db()
+    except Exception as e:
+        failures.append(f"  移行 NG: 再起動時の init_db -> {type(e).__name__}: {e}")
+    return total
+
+
+async def _test_pagination(tmp: Path, failures: list[str]) -> int:
+    """(remind_at, id) のキーセットで取得したページが重複・欠落なく連続する（同時刻の行を含む）"""
+    await _use_db(tmp / "paging.db")
+    await database.init_db()
+
+    base = datetime(2026, 2, 1, 9, 0, tzinfo=TZ)
+    # 同じ時刻を複数含み、挿入順と時刻順を入れ替えておく
+    offsets = [2, 0, 1, 1, 0, 2, 1, 3]
+    expected_ids = []
+    for i, offset in enumerate(offsets):
+        reminder_id = await database.create_reminder("1", None, "10", f"r{i}", base + timedelta(hours=offset))
+        expected_ids.append((offset, reminder_id))
+    expected_ids = [reminder_id for _, reminder_id in sorted(expected_ids)]
+    # 他ユーザーの行・非アクティブな行は含まれない
+    await database.create_reminder("2", None, "10", "other", base)
+    inactive_id = await database.create_reminder("1", None, "10", "inactive", base)
+    await database.deactivate_reminder(inactive_id)
+
+    total = 0
+    for limit in (1, 2, 3, len(offsets), len(offsets) + 1):
+        total += 1
+        pages = []
+        after = None
+        while True:
+            page = await database.get_user_reminders("1", limit=limit, after=after)
+            if not page:
+                break
+            pages.append([r["id"] for r in page])
+            if len(page) < limit:
+                break
+            last = page[-1]
+            after = (from_epoch(last["remind_at"]), last["id"])
+        actual_ids = [reminder_id for page in pages for reminder_id in page]
+        if actual_ids != expected_ids:
+            failures.append(f"  頁 NG: limit={limit} -> {pages} (expected {expected_ids})")
+        elif any(len(page) > limit for page in pages):
+            failures.append(f"  頁 NG: limit={limit} のページが上限を超過 -> {pages}")
+
+    total += 1
+    count = await database.count_user_reminders("1")
+    if count != len(offsets):
+        failures.append(f"  頁 NG: count_user_reminders -> {count} (expected {len(offsets)})")
+    return total
+
+
+async def _test_bulk_reschedule(tmp: Path, failures: list[str]) -> int:
+    """繰り返しの一括更新は、取得後に時刻が変わった行（送信中のスヌーズ）を上書きしない"""
+    await _use_db(tmp / "bulk.db")
+    await database.init_db()
+
+    base = datetime(2026, 2, 1, 9, 0, tzinfo=TZ)
+    kept_id = await database.create_reminder("1", None, "10", "通常", base, "daily")
+    snoozed_id = await database.create_reminder("1", None, "10", "スヌーズ", base, "daily")
+    fetched = {r["id"]: r["remind_at"] for r in await database.get_due_reminders(base)}
+
+    snoozed_at = base + timedelta(minutes=5)
+    await database.snooze_reminder(snoozed_id, snoozed_at)
+    next_time = base + timedelta(days=1)
+    updated = await database.update_reminder_times_bulk(
+        [(kept_id, next_time, fetched[kept_id]), (snoozed_id, next_time, fetched[snoozed_id])]
+    )
+
+    # (ID, 期待する remind_at)
+    expected = [(kept_id, next_time), (snoozed_id, snoozed_at)]
+    total = len(expected) + 1
+    for reminder_id, exp in expected:
+        row = await database.get_reminder_by_id(reminder_id)
+        actual = from_epoch(row["remind_at"]) if row else None
+        if actual != exp:
+            failures.append(f"  一括 NG: ID={reminder_id} -> {actual} (expected {exp})")
+    if updated != 1:
+        failures.append(f"  一括 NG: 更新件数 -> {updated} (expected 1)")
+    return total
+
+
+async def _run_async(failures: list[str]) -> int:
+    total = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        original_path = database.DB_PATH
+        try:
+            print("=== マイグレーションテスト ===")
+            total += await _test_migration(Path(tmp), failures)
+            print("=== ページングテスト ===")
+            total += await _test_pagination(Path(tmp), failures)
+            print("=== 一括更新テスト ===")
+            total += await _test_bulk_reschedule(Path(tmp), failures)
+        finally:
+            await database.close_db()
+            database.DB_PATH = original_path
+    return total
+
+
+def run_tests():
+    """全テストを実行"""
+    failures = []
+    total = asyncio.run(_run_async(failures))
+
+    # === 結果 ===
+    passed = total - len(failures)
+    print()
+    if failures:
+        for f in failures:
+            print(f)
+        print()
+    print(f"{passed}/{total} passed")
+    return len(failures) == 0
+
+
+if __name__ == "__main__":
+    import sys
+    ok = run_tests()
+    sys.exit(0 if ok else 1)
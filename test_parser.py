@@ -1,9 +1,11 @@
-"""llm_parserのパターンマッチ・content抽出テスト"""
+"""llm_parserのパターンマッチ・content抽出、およびモーダル日時入力のテスト"""
 
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+from bot import _parse_explicit_datetime
 from llm_parser import extract_content, parse_datetime_pattern, parse_repeat_pattern
+from utils import parse_datetime_input
 
 TZ = ZoneInfo("Asia/Tokyo")
 # 基準: 2026/01/31 (土) 23:00
@@ -371,6 +373,118 @@ def run_tests():
         if actual != expected:
             failures.append(f"  繰内 NG: \"{inp}\" -> \"{actual}\" (expected \"{expected}\")")
 
+    # === モーダル日時入力テスト ===
+    datetime_input_tests = [
+        # (日付, 時刻, 期待する年/月/日 時:分 or None)
+        ("2026/01/29", "18:00", "2026/01/29 18:00"),
+        ("２０２６/０１/２９", "１８：００", "2026/01/29 18:00"),
+        ("2028/02/29", "9", "2028/02/29 09:00"),
+        ("2026/02/29", "9:00", None),
+        ("2026/13/01", "9:00", None),
+        ("2026/01/29", "24:00", None),
+        ("2026/01/29", "18:60", None),
+        ("2026/1/29/1", "18:00", None),
+        ("2026-01-29", "18:00", None),
+        # int() できない数字類似文字は例外ではなくNone
+        ("1/²", "10:00", None),
+        ("①/1", "10:00", None),
+        ("2026/01/29", "1²", None),
+        ("2026/01/29", "١٠:00", None),
+    ]
+
+    print("=== モーダル日時入力テスト ===")
+    for date_str, time_str, expected in datetime_input_tests:
+        total += 1
+        try:
+            result = parse_datetime_input(date_str, time_str)
+        except Exception as e:
+            failures.append(f"  入力 NG: \"{date_str} {time_str}\" -> {type(e).__name__}: {e}")
+            continue
+        actual = result.strftime("%Y/%m/%d %H:%M") if result else None
+        if actual != expected:
+            failures.append(f"  入力 NG: \"{date_str} {time_str}\" -> \"{actual}\" (expected \"{expected}\")")
+
+    # === モーダル相対日付テスト ===
+    year_end = datetime(2026, 12, 31, 22, 0, tzinfo=TZ)
+    leap_eve = datetime(2028, 2, 28, 10, 0, tzinfo=TZ)
+    relative_input_tests = [
+        # (日付, 時刻, 基準日時, 期待する年/月/日 時:分 or None)
+        ("今日", "18:00", NOW, "2026/01/31 18:00"),
+        ("明日", "9:00", NOW, "2026/02/01 09:00"),
+        ("明後日", "9", NOW, "2026/02/02 09:00"),
+        ("0日後", "7:00", NOW, "2026/01/31 07:00"),
+        ("3日後", "12:30", NOW, "2026/02/03 12:30"),
+        ("29日後", "8:00", NOW, "2026/03/01 08:00"),
+        ("１日後", "１０：００", NOW, "2026/02/01 10:00"),
+        ("02/14", "10:00", NOW, "2026/02/14 10:00"),
+        # 年またぎ・うるう年
+        ("明日", "0:00", year_end, "2027/01/01 00:00"),
+        ("明後日", "7:05", year_end, "2027/01/02 07:05"),
+        ("365日後", "9:00", year_end, "2027/12/31 09:00"),
+        ("02/29", "9:00", year_end, None),
+        ("明日", "9:00", leap_eve, "2028/02/29 09:00"),
+        ("02/29", "9:00", leap_eve, "2028/02/29 09:00"),
+        # 不正入力
+        ("明々後日", "9:00", NOW, None),
+        ("日後", "9:00", NOW, None),
+        ("-1日後", "9:00", NOW, None),
+        ("10000日後", "9:00", NOW, None),
+        ("²日後", "9:00", NOW, None),
+        ("明日", "25:00", NOW, None),
+        ("明日", "", NOW, None),
+        ("明日の朝", "9:00", NOW, None),
+    ]
+
+    print("=== モーダル相対日付テスト ===")
+    for date_str, time_str, now, expected in relative_input_tests:
+        total += 1
+        try:
+            result = parse_datetime_input(date_str, time_str, now)
+        except Exception as e:
+            failures.append(f"  相対 NG: \"{date_str} {time_str}\" -> {type(e).__name__}: {e}")
+            continue
+        actual = result.strftime("%Y/%m/%d %H:%M") if result else None
+        if actual != expected:
+            failures.append(f"  相対 NG: \"{date_str} {time_str}\" -> \"{actual}\" (expected \"{expected}\")")
+
+    # === 「日付 時刻 内容」直接パーステスト ===
+    leap_next = datetime(2028, 3, 1, 10, 0, tzinfo=TZ)
+    explicit_tests = [
+        # (入力, 基準日時, 期待する年/月/日 時:分, 期待する内容) 該当しなければ None
+        ("2026/01/29 18:00 歯医者", NOW, "2026/01/29 18:00", "歯医者"),
+        ("2026/01/29 18:00 歯医者 の予約", NOW, "2026/01/29 18:00", "歯医者 の予約"),
+        ("2026/01/29 18:00", NOW, None, None),
+        ("明日 18:00 歯医者", NOW, None, None),
+        ("1/² 10:00 歯医者", NOW, None, None),
+        ("2026/02/30 18:00 歯医者", NOW, None, None),
+        ("2026/1/29 9 朝会", NOW, "2026/01/29 09:00", "朝会"),
+        ("2026/01/29 25:00 歯医者", NOW, None, None),
+        ("2026/01/29 18時 歯医者", NOW, None, None),
+        # 年を省略した日付は基準日時（NOW: 2026/01/31 23:00）以前なら翌年
+        ("01/05 9:00 歯医者", NOW, "2027/01/05 09:00", "歯医者"),
+        ("01/31 23:00 歯医者", NOW, "2027/01/31 23:00", "歯医者"),
+        ("01/31 23:30 歯医者", NOW, "2026/01/31 23:30", "歯医者"),
+        ("02/14 10:00 歯医者", NOW, "2026/02/14 10:00", "歯医者"),
+        ("12/31 9:00 大掃除", NOW, "2026/12/31 09:00", "大掃除"),
+        # 年を指定した過去の日付はそのまま
+        ("2025/01/05 9:00 歯医者", NOW, "2025/01/05 09:00", "歯医者"),
+        # 2/29 の翌年は存在しないので直接パースせず後段の解析に回す
+        ("02/29 9:00 歯医者", leap_next, None, None),
+    ]
+
+    print("=== 直接パーステスト ===")
+    for inp, now, exp_dt, exp_content in explicit_tests:
+        total += 1
+        try:
+            result = _parse_explicit_datetime(inp, now)
+        except Exception as e:
+            failures.append(f"  直接 NG: \"{inp}\" -> {type(e).__name__}: {e}")
+            continue
+        actual_dt = result.remind_at.strftime("%Y/%m/%d %H:%M") if result else None
+        actual_content = result.content if result else None
+        if (actual_dt, actual_content) != (exp_dt, exp_content):
+            failures.append(f"  直接 NG: \"{inp}\" -> ({actual_dt}, {actual_content}) (expected ({exp_dt}, {exp_content}))")
+
     # === 結果 ===
     passed = total - len(failures)
     print()
@@ -1,16 +1,58 @@
 """共通ユーティリティ"""
 
-from datetime import datetime
+import calendar
+import re
+from datetime import MAXYEAR, MINYEAR, datetime, timedelta
 from zoneinfo import ZoneInfo
 
 from config import TIMEZONE
 
 WEEKDAY_JA = ["月", "火", "水", "木", "金", "土", "日"]
 
+# 設定タイムゾーン（呼び出しごとにZoneInfoを生成しないよう共有する）
+TZ = ZoneInfo(TIMEZONE)
+
+# モーダル入力の相対日付・時刻（LLMを呼ばずにローカルで解釈する）
+# 全角の数字・区切りは半角にしてから、ASCIIの数字だけを受け付ける（「²」「①」などは int() できない）
+_ZEN2HAN = str.maketrans("０１２３４５６７８９／：", "0123456789/:")
+_REL_DATE_RE = re.compile(r"^(今日|明日|明後日|(\d{1,4})日後)$", re.ASCII)
+_REL_DAYS = {"今日": 0, "明日": 1, "明後日": 2}
+_TIME_RE = re.compile(r"^(\d{1,2})(?::(\d{1,2}))?$", re.ASCII)
+
+
+def from_epoch(timestamp: int) -> datetime:
+    """DBに保存したUnix秒を設定タイムゾーンのdatetimeに変換"""
+    return datetime.fromtimestamp(timestamp, TZ)
+
+
+def to_epoch(dt: datetime) -> int:
+    """datetimeをDB保存用のUnix秒に変換（naiveは設定タイムゾーンとみなす）"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=TZ)
+    return int(dt.timestamp())
+
+
+def truncate(text: str, limit: int, suffix: str = "") -> str:
+    """limit文字を超える場合のみ切り詰める（suffix込みでlimit文字以内、短ければ元の文字列を返す）"""
+    if len(text) <= limit:
+        return text
+    return text[: limit - len(suffix)] + suffix
+
+
+def format_full_datetime(dt: datetime) -> str:
+    """日時を年付きでフォーマット（例: 2026/01/29 (木) 18:00）"""
+    return dt.strftime(f"%Y/%m/%d ({WEEKDAY_JA[dt.weekday()]}) %H:%M")
+
+
+def format_short_datetime(dt: datetime) -> str:
+    """日時を短い表示用にフォーマット（例: 01/29 (木) 18:00）"""
+    # 曜日を書式に埋め込み、strftime 1回で生成する
+    return dt.strftime(f"%m/%d ({WEEKDAY_JA[dt.weekday()]}) %H:%M")
+
 
 def format_remaining(target: datetime) -> str:
     """目標日時までの相対時間を表示用にフォーマット"""
-    tz = ZoneInfo(TIMEZONE)
+    tz = TZ
     now = datetime.now(tz)
 
     if target.tzinfo is None:
@@ -60,26 +102,40 @@ def format_repeat_label(repeat_type: str, repeat_value: str | None = None) -> st
     return f"{base}{repeat_value}"
 
 
-def parse_datetime_input(date_str: str, time_str: str) -> datetime | None:
-    """日付文字列と時刻文字列からdatetimeを生成。パース失敗時はNone。"""
-    tz = ZoneInfo(TIMEZONE)
-    try:
-        if "/" in date_str:
-            parts = date_str.split("/")
-            if len(parts) == 3:
-                year, month, day = int(parts[0]), int(parts[1]), int(parts[2])
-            elif len(parts) == 2:
-                year = datetime.now(tz).year
-                month, day = int(parts[0]), int(parts[1])
-            else:
-                return None
+def parse_datetime_input(date_str: str, time_str: str, now: datetime | None = None) -> datetime | None:
+    """日付文字列と時刻文字列からdatetimeを生成。パース失敗時はNone。
+
+    日付は「2026/01/29」「01/29」のほか「今日」「明日」「明後日」「N日後」に対応。
+    相対日付と年の省略は now（省略時は現在時刻）を基準にする。
+    """
+    tz = TZ
+    if now is None:
+        now = datetime.now(tz)
+    date_str = date_str.strip().translate(_ZEN2HAN)
+    time_match = _TIME_RE.match(time_str.strip().translate(_ZEN2HAN))
+    if not time_match:
+        return None
+    hour = int(time_match.group(1))
+    minute = int(time_match.group(2) or 0)
+    if hour > 23 or minute > 59:
+        return None
+
+    # 例外で分岐せず、数字チェックと範囲チェックで不正入力を弾く
+    rel_match = _REL_DATE_RE.match(date_str)
+    if rel_match:
+        days = int(rel_match.group(2)) if rel_match.group(2) else _REL_DAYS[rel_match.group(1)]
+        target = now + timedelta(days=days)
+        year, month, day = target.year, target.month, target.day
+    else:
+        parts = date_str.split("/")
+        if not 2 <= len(parts) <= 3 or not all(p.isascii() and p.isdecimal() for p in parts):
+            return None
+        if len(parts) == 3:
+            year, month, day = int(parts[0]), int(parts[1]), int(parts[2])
         else:
+            year = now.year
+            month, day = int(parts[0]), int(parts[1])
+        if not (MINYEAR <= year <= MAXYEAR and 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]):
             return None
 
-        time_parts = time_str.split(":")
-        hour = int(time_parts[0])
-        minute = int(time_parts[1]) if len(time_parts) > 1 else 0
-
-        return datetime(year, month, day, hour, minute, tzinfo=tz)
-    except (ValueError, IndexError):
-        return None
+    return datetime(year, month, day, hour, minute, tzinfo=tz)